@@ -0,0 +1,125 @@
+"""
+Recall@k vs latency report for the first-stage retrievers
+
+Builds (or loads) a movie-plot index, encodes a sample of queries once, and
+compares IVFRetriever at several nprobe settings against the exact scan.
+
+Usage:
+    python ann_report.py --docs 5000 --queries 200 --index ./data/index
+"""
+
+from main import load_wiki_movies
+from rag import INSTRUCTIONS, RAG
+from retrievers import ExactRetriever, IVFRetriever
+import argparse
+import json
+import numpy as np
+import os
+import time
+
+
+def first_sentence(text: str) -> str:
+    return text.strip().split(". ")[0][:300]
+
+
+def time_search(retriever, query_embeddings: np.ndarray, k: int):
+    """Run queries one at a time, returning (indices, per-query latencies)"""
+    indices, latencies = [], []
+    for q in query_embeddings:
+        start = time.perf_counter()
+        _, top = retriever.search(q[None], k)
+        latencies.append(time.perf_counter() - start)
+        indices.append(top[0])
+    return np.array(indices), np.array(latencies)
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = []
+    for f, t in zip(found, truth):
+        relevant = set(t[t >= 0])
+        hits.append(len(set(f[f >= 0]) & relevant) / max(1, len(relevant)))
+    return float(np.mean(hits))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docs", type=int, default=5000, help="Movie plots to index")
+    parser.add_argument("--queries", type=int, default=200, help="Sampled queries")
+    parser.add_argument("--k", type=int, default=10, help="Recall cutoff")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--n-lists", type=int, default=None)
+    parser.add_argument(
+        "--index", default=None, help="Index directory to reuse or create"
+    )
+    parser.add_argument("--json", default=None, help="Write the report to this file")
+    args = parser.parse_args()
+
+    movies = load_wiki_movies()[: args.docs].tolist()
+    if args.index and os.path.exists(os.path.join(args.index, "config.json")):
+        rag = RAG.load(args.index)
+    else:
+        rag = RAG()
+        rag.add_documents(movies)
+        if args.index:
+            rag.save(args.index)
+    embeddings = rag.chunks.embeddings
+
+    rng = np.random.default_rng(0)
+    sample = rng.choice(len(movies), min(args.queries, len(movies)), replace=False)
+    queries = [INSTRUCTIONS["qa"]["query"] + first_sentence(movies[i]) for i in sample]
+    query_embeddings = rag.query_model.encode(
+        queries, normalize_embeddings=True, convert_to_numpy=True
+    )
+
+    exact = ExactRetriever()
+    exact.index(embeddings)
+    truth, latencies = time_search(exact, query_embeddings, args.k)
+    rows = [
+        {
+            "backend": "exact",
+            "nprobe": None,
+            "recall": 1.0,
+            "p50_ms": float(np.percentile(latencies, 50) * 1000),
+            "p95_ms": float(np.percentile(latencies, 95) * 1000),
+        }
+    ]
+
+    ivf = IVFRetriever(n_lists=args.n_lists)
+    start = time.perf_counter()
+    ivf.index(embeddings)
+    build_s = time.perf_counter() - start
+    for nprobe in args.nprobe:
+        ivf.nprobe = nprobe
+        found, latencies = time_search(ivf, query_embeddings, args.k)
+        rows.append(
+            {
+                "backend": "ivf",
+                "nprobe": nprobe,
+                "recall": recall_at_k(found, truth),
+                "p50_ms": float(np.percentile(latencies, 50) * 1000),
+                "p95_ms": float(np.percentile(latencies, 95) * 1000),
+            }
+        )
+
+    print(
+        f"Chunks: {len(embeddings)}  IVF lists: {len(ivf.centroids)}  build: {build_s:.2f}s"
+    )
+    print(
+        f"{'backend':<8} {'nprobe':>6} {f'recall@{args.k}':>10} {'p50 ms':>8} {'p95 ms':>8}"
+    )
+    for row in rows:
+        nprobe = "-" if row["nprobe"] is None else row["nprobe"]
+        print(
+            f"{row['backend']:<8} {nprobe:>6} {row['recall']:>10.3f} "
+            f"{row['p50_ms']:>8.3f} {row['p95_ms']:>8.3f}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(
+                {"chunks": len(embeddings), "k": args.k, "results": rows}, f, indent=2
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""
+Benchmark harness for the chunk, ingest, first-stage scoring and rerank stages
+
+Builds a synthetic or wiki-movie corpus of roughly the requested number of
+chunks and reports p50/p95/p99 latency and throughput per stage as JSON.
+The default stand-in models are small hashing encoders that run on CPU
+without downloading the BAAI models.
+
+Usage:
+    python bench.py --corpus synthetic --sizes 1000 10000 100000 --output bench.json
+    python bench.py --corpus wiki --sizes 10000 --models real
+"""
+
+from rag import INSTRUCTIONS, RAG
+from typing import Dict, List, Optional
+import argparse
+import json
+import numpy as np
+import platform
+import re
+import sys
+import time
+import zlib
+
+WORD_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+def _hash(token: str) -> int:
+    return zlib.crc32(token.lower().encode("utf-8"))
+
+
+class RegexTokenizer:
+    """Stand-in fast tokenizer: regex word pieces with hashed ids and offsets"""
+
+    def __init__(self, vocab_size: int = 30522):
+        self.vocab_size = vocab_size
+
+    def __call__(self, text: str, add_special_tokens: bool = False, **kwargs) -> Dict:
+        matches = list(WORD_PATTERN.finditer(text))
+        return {
+            "input_ids": [_hash(m.group()) % self.vocab_size for m in matches],
+            "offset_mapping": [m.span() for m in matches],
+        }
+
+    def encode(self, text: str, add_special_tokens: bool = False) -> List[int]:
+        return self(text)["input_ids"]
+
+
+class HashingEncoder:
+    """Stand-in bi-encoder: signed feature hashing of words, L2 normalized"""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def encode(self, texts, normalize_embeddings: bool = True, **kwargs) -> np.ndarray:
+        single = isinstance(texts, str)
+        if single:
+            texts = [texts]
+
+        embeddings = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in WORD_PATTERN.findall(text):
+                h = _hash(word)
+                embeddings[row, h % self.dim] += 1.0 if h & 1 << 31 else -1.0
+        if normalize_embeddings:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings /= np.maximum(norms, 1e-12)
+        return embeddings[0] if single else embeddings
+
+
+class OverlapCrossEncoder:
+    """Stand-in cross-encoder: word overlap between query and passage"""
+
+    def predict(self, pairs, **kwargs) -> np.ndarray:
+        scores = np.empty(len(pairs), dtype=np.float32)
+        for i, (query, passage) in enumerate(pairs):
+            query_words = set(WORD_PATTERN.findall(query.lower()))
+            passage_words = set(WORD_PATTERN.findall(passage.lower()))
+            scores[i] = len(query_words & passage_words) / max(1, len(query_words))
+        return scores
+
+
+def make_rag(models: str, **kwargs) -> RAG:
+    """RAG with stand-in models, or the default BAAI models for 'real'"""
+    if models == "real":
+        return RAG(cache_size=0, rerank_cache_size=0, **kwargs)
+    return RAG(
+        cache_size=0,
+        rerank_cache_size=0,
+        **kwargs,
+        base_model=HashingEncoder(),
+        query_model=HashingEncoder(),
+        reranker=OverlapCrossEncoder(),
+        tokenizer=RegexTokenizer(),
+    )
+
+
+def synthetic_corpus(n_chunks: int, seed: int = 0) -> List[str]:
+    """
+    Documents with Zipf-distributed words, sized to yield about n_chunks chunks
+    Args:
+        n_chunks: Target number of chunks with the default window and overlap
+        seed: Random seed
+    """
+    rng = np.random.default_rng(seed)
+    vocab = np.array([f"w{i}" for i in range(50_000)])
+    chunk_size, stride = 192, int(192 * (1 - 0.85))
+
+    documents, total = [], 0
+    while total < n_chunks:
+        n_words = int(rng.integers(100, 800))
+        words = vocab[np.minimum(rng.zipf(1.2, n_words), len(vocab)) - 1]
+        sentences = [" ".join(words[i : i + 12]) + "." for i in range(0, n_words, 12)]
+        documents.append(" ".join(sentences))
+        # One token per word plus one per full stop, as the stand-in tokenizer counts
+        n_tokens = n_words + len(sentences)
+        total += 1 + max(0, -(-(n_tokens - chunk_size) // stride))
+    return documents
+
+
+def wiki_corpus(n_chunks: int, rag: RAG) -> List[str]:
+    """Leading wiki movie plots, taken until they yield about n_chunks chunks"""
+    from main import load_wiki_movies
+
+    documents, total = [], 0
+    for plot in load_wiki_movies():
+        if total >= n_chunks:
+            break
+        documents.append(plot)
+        total += len(rag._chunk_spans(plot))
+    return documents
+
+
+def make_queries(documents: List[str], n_queries: int, seed: int = 0) -> List[str]:
+    """First sentence of randomly sampled documents"""
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(len(documents), min(n_queries, len(documents)), replace=False)
+    return [documents[i].strip().split(". ")[0][:300] for i in picks]
+
+
+def summarize(latencies: List[float], items: Optional[int] = None) -> Dict[str, float]:
+    """
+    Latency percentiles and throughput for a list of per-call timings
+    Args:
+        latencies: Seconds per call
+        items: Units processed across all calls (defaults to one per call)
+    """
+    latencies = np.asarray(latencies)
+    total = float(latencies.sum())
+    items = len(latencies) if items is None else items
+    return {
+        "calls": len(latencies),
+        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "p95_ms": float(np.percentile(latencies, 95) * 1000),
+        "p99_ms": float(np.percentile(latencies, 99) * 1000),
+        "mean_ms": float(latencies.mean() * 1000),
+        "throughput_per_s": items / total if total > 0 else 0.0,
+    }
+
+
+def timed(fn, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def bench_size(args, n_chunks: int) -> Dict:
+    rag = make_rag(args.models)
+    if args.corpus == "wiki":
+        documents = wiki_corpus(n_chunks, rag)
+    else:
+        documents = synthetic_corpus(n_chunks, seed=args.seed)
+    queries = make_queries(documents, args.queries, seed=args.seed)
+
+    chunk_docs = documents[: args.chunk_docs]
+    chunk_latencies = [timed(rag.chunk, doc) for doc in chunk_docs]
+    chunk_tokens = sum(
+        len(tokens) for doc in chunk_docs for _, _, tokens in rag._chunk_spans(doc)
+    )
+
+    # Per-pool ingest latency, measured between progress callbacks
+    pool_latencies, last = [], [time.perf_counter()]
+
+    def on_pool(stats):
+        now = time.perf_counter()
+        pool_latencies.append(now - last[0])
+        last[0] = now
+
+    ingest = rag.add_documents(documents, batch_size=args.batch_size, progress=on_pool)
+
+    query_embeddings = rag.query_model.encode(
+        [INSTRUCTIONS["qa"]["query"] + query for query in queries],
+        normalize_embeddings=True,
+        convert_to_numpy=True,
+        show_progress_bar=False,
+    )
+    rag.retriever.index(rag.chunks.embeddings)
+    for q in query_embeddings[: args.warmup]:
+        rag.retriever.search(q[None], args.top_k)
+    scoring_latencies = [
+        timed(rag.retriever.search, q[None], args.top_k) for q in query_embeddings
+    ]
+
+    _, indices = rag.retriever.search(query_embeddings, args.top_k)
+    candidates = [[rag.chunks.text(i) for i in row if i >= 0] for row in indices]
+    rerank_latencies = [
+        timed(rag.rerank, query, passages)
+        for query, passages in zip(queries, candidates)
+    ]
+
+    return {
+        "chunks": len(rag.chunks),
+        "documents": len(documents),
+        "stages": {
+            "chunk": {
+                **summarize(chunk_latencies),
+                "tokens_per_s": chunk_tokens / max(sum(chunk_latencies), 1e-12),
+            },
+            "add_documents": {
+                **summarize(pool_latencies, items=ingest.chunks),
+                "seconds": ingest.elapsed,
+                "chunks_per_s": ingest.chunks_per_s,
+                "tokens_per_s": ingest.tokens_per_s,
+            },
+            "first_stage": summarize(scoring_latencies),
+            "rerank": {
+                **summarize(rerank_latencies),
+                "pairs_per_s": sum(map(len, candidates))
+                / max(sum(rerank_latencies), 1e-12),
+            },
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", choices=["synthetic", "wiki"], default="synthetic")
+    parser.add_argument("--models", choices=["stand-in", "real"], default="stand-in")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--chunk-docs", type=int, default=500)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="JSON file (default stdout)")
+    args = parser.parse_args()
+
+    report = {
+        "config": vars(args),
+        "environment": {
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+        },
+        "results": [bench_size(args, n_chunks) for n_chunks in args.sizes],
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
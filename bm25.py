@@ -0,0 +1,208 @@
+from array import array
+from collections import Counter
+from store import _write_atomic
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import threading
+
+
+class BM25Index:
+    """
+    In-memory BM25 inverted index over chunk rows
+
+    Postings are kept per term id in two growable typed arrays (row ids and
+    term frequencies), so appends are amortized O(1) and a lookup turns each
+    posting list into a NumPy view without copying. Term ids come straight
+    from the chunker's tokenizer output, so indexing needs no extra
+    tokenization. Document frequencies include tombstoned rows until the
+    next compaction. A lock serializes appends with lookups, since a typed
+    array cannot grow while NumPy views of it are alive.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        """
+        Args:
+            k1: Term frequency saturation
+            b: Length normalization strength
+        """
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[int, Tuple[array, array]] = {}
+        self._lengths = array("i")
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(self, first_row: int, token_ids: Iterable[List[int]]) -> None:
+        """
+        Index consecutive rows
+        Args:
+            first_row: Row id of the first token list, must equal len(self)
+            token_ids: Token ids of each row, in row order
+        """
+        with self._lock:
+            self._add(first_row, token_ids)
+
+    def _add(self, first_row: int, token_ids: Iterable[List[int]]) -> None:
+        if first_row != len(self._lengths):
+            raise ValueError(f"Expected row {len(self._lengths)}, got {first_row}")
+
+        for row, tokens in enumerate(token_ids, first_row):
+            self._lengths.append(len(tokens))
+            self._total_length += len(tokens)
+            for term, tf in Counter(tokens).items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = (array("i"), array("H"))
+                postings[0].append(row)
+                postings[1].append(min(tf, 0xFFFF))
+
+    def search(
+        self, token_ids: List[int], k: int, mask: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k rows by BM25 score
+        Args:
+            token_ids: Query token ids
+            k: Number of rows to return
+            mask: Optional alive mask, rows where it is False are skipped
+        Returns:
+            (scores, rows) in descending score order, at most k long
+        """
+        with self._lock:
+            return self._search(token_ids, k, mask)
+
+    def _search(
+        self, token_ids: List[int], k: int, mask: Optional[np.ndarray]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        n_rows = len(self._lengths)
+        if n_rows == 0:
+            return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+
+        lengths = np.frombuffer(self._lengths, dtype=np.int32)
+        avg_length = self._total_length / n_rows
+        scores = np.zeros(n_rows, dtype=np.float32)
+        touched = []
+        for term in set(token_ids):
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            rows = np.frombuffer(postings[0], dtype=np.int32)
+            tf = np.frombuffer(postings[1], dtype=np.uint16).astype(np.float32)
+            df = len(rows)
+            idf = np.log(1 + (n_rows - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * lengths[rows] / avg_length)
+            # Rows are unique within a posting list, so fancy += is safe
+            scores[rows] += idf * tf * (self.k1 + 1) / (tf + norm)
+            touched.append(rows)
+
+        if not touched:
+            return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+        candidates = np.unique(np.concatenate(touched)).astype(np.int64)
+        if mask is not None:
+            # Rows past the end of the mask were appended after it was taken
+            alive = np.ones(len(candidates), dtype=bool)
+            inside = candidates < len(mask)
+            alive[inside] = mask[candidates[inside]]
+            candidates = candidates[alive]
+
+        candidate_scores = scores[candidates]
+        if len(candidates) > k:
+            top = np.argpartition(-candidate_scores, k - 1)[:k]
+            candidates, candidate_scores = candidates[top], candidate_scores[top]
+        order = np.argsort(-candidate_scores, kind="stable")
+        return candidate_scores[order], candidates[order]
+
+    def compact(self, remap: np.ndarray) -> None:
+        """
+        Drop and renumber rows after a store compaction
+        Args:
+            remap: New row for every old row, -1 for dropped rows
+        """
+        with self._lock:
+            self._compact(remap)
+
+    def _compact(self, remap: np.ndarray) -> None:
+        lengths = np.frombuffer(self._lengths, dtype=np.int32)
+        kept = remap[: len(lengths)] >= 0
+        new_lengths = lengths[kept]
+        self._lengths = array("i", new_lengths.tobytes())
+        self._total_length = int(new_lengths.sum())
+
+        postings = {}
+        for term, (rows, tfs) in self._postings.items():
+            new_rows = remap[np.frombuffer(rows, dtype=np.int32)]
+            keep = new_rows >= 0
+            if keep.any():
+                tfs = np.frombuffer(tfs, dtype=np.uint16)[keep]
+                postings[term] = (
+                    array("i", new_rows[keep].astype(np.int32).tobytes()),
+                    array("H", tfs.tobytes()),
+                )
+        self._postings = postings
+
+    def save(self, path: str) -> None:
+        """Write postings in CSR form to a .npz file"""
+        with self._lock:
+            self._save(path)
+
+    def _save(self, path: str) -> None:
+        _write_atomic(path, self._savez)
+
+    def _savez(self, f) -> None:
+        terms = np.array(sorted(self._postings), dtype=np.int64)
+        counts = [len(self._postings[term][0]) for term in terms]
+        offsets = np.concatenate([[0], np.cumsum(counts, dtype=np.int64)])
+        rows = [
+            np.frombuffer(self._postings[term][0], dtype=np.int32) for term in terms
+        ]
+        tfs = [
+            np.frombuffer(self._postings[term][1], dtype=np.uint16) for term in terms
+        ]
+        np.savez(
+            f,
+            params=np.array([self.k1, self.b]),
+            lengths=np.frombuffer(self._lengths, dtype=np.int32),
+            terms=terms,
+            offsets=offsets,
+            rows=np.concatenate(rows) if rows else np.empty(0, dtype=np.int32),
+            tfs=np.concatenate(tfs) if tfs else np.empty(0, dtype=np.uint16),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        """Read an index written by save"""
+        data = np.load(path)
+        k1, b = data["params"]
+        index = cls(k1=float(k1), b=float(b))
+        lengths = data["lengths"].astype(np.int32)
+        index._lengths = array("i", lengths.tobytes())
+        index._total_length = int(lengths.sum())
+
+        offsets, rows, tfs = data["offsets"], data["rows"], data["tfs"]
+        for i, term in enumerate(data["terms"]):
+            start, end = offsets[i], offsets[i + 1]
+            index._postings[int(term)] = (
+                array("i", rows[start:end].astype(np.int32).tobytes()),
+                array("H", tfs[start:end].astype(np.uint16).tobytes()),
+            )
+        return index
+
+
+def reciprocal_rank_fusion(rankings: List[np.ndarray], k: int = 60) -> np.ndarray:
+    """
+    Merge ranked row lists with reciprocal rank fusion
+    Args:
+        rankings: Row ids per ranker, best first (-1 entries are ignored)
+        k: RRF damping constant
+    Returns:
+        Row ids ordered by fused score, best first
+    """
+    fused = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking):
+            if row >= 0:
+                fused[int(row)] = fused.get(int(row), 0.0) + 1.0 / (k + rank + 1)
+    return np.array(sorted(fused, key=fused.get, reverse=True), dtype=np.int64)
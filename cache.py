@@ -0,0 +1,212 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Hashable, List, Optional
+import dbm
+import hashlib
+import numpy as np
+import os
+import threading
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters for a cache"""
+
+    hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.disk_hits + self.misses
+        return (self.hits + self.disk_hits) / total if total else 0.0
+
+    def add(self, other: "CacheStats") -> None:
+        self.hits += other.hits
+        self.disk_hits += other.disk_hits
+        self.misses += other.misses
+
+
+def content_key(*parts: str) -> str:
+    """Stable hash of a sequence of strings, used as a cache key"""
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class LRUCache:
+    """Thread-safe bounded mapping that evicts the least recently used entry"""
+
+    def __init__(self, max_entries: int):
+        """
+        Args:
+            max_entries: Maximum number of entries kept (0 disables caching)
+        """
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class EmbeddingCache:
+    """
+    Two-tier embedding cache keyed by a hash of (model name, instruction, text)
+
+    The first tier is an in-memory LRU. The optional second tier is a dbm
+    file under path that survives restarts and is shared by every model,
+    since the model name is part of the key.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 100_000,
+        path: Optional[str] = None,
+        name: str = "embeddings",
+    ):
+        """
+        Args:
+            max_entries: Entries kept in the in-memory LRU
+            path: Directory for the on-disk tier (None keeps the cache in memory)
+            name: File name of the on-disk tier inside path
+        """
+        self.memory = LRUCache(max_entries)
+        self.stats = CacheStats()
+        self._stats_lock = threading.Lock()
+        self._disk = None
+        self._disk_lock = threading.Lock()
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+            self._disk = dbm.open(os.path.join(path, name), "c")
+
+    @staticmethod
+    def key(model_name: str, instruction: str, text: str) -> str:
+        return content_key(model_name, instruction, text)
+
+    def get_many(
+        self,
+        model_name: str,
+        instruction: str,
+        texts: List[str],
+        stats: Optional[CacheStats] = None,
+    ) -> List[Optional[np.ndarray]]:
+        """
+        Cached embedding per text, None where missing
+        Args:
+            model_name: Name identifying the model in cache keys
+            instruction: Prefix the embeddings were computed with
+            texts: Texts to look up
+            stats: Also receives this call's own hits and misses
+        """
+        call = CacheStats()
+        found = []
+        for text in texts:
+            key = self.key(model_name, instruction, text)
+            embedding = self.memory.get(key)
+            if embedding is not None:
+                call.hits += 1
+            elif (
+                self._disk is not None
+                and (embedding := self._disk_get(key)) is not None
+            ):
+                call.disk_hits += 1
+                self.memory.put(key, embedding)
+            else:
+                call.misses += 1
+            found.append(embedding)
+
+        with self._stats_lock:
+            self.stats.add(call)
+        if stats is not None:
+            stats.add(call)
+        return found
+
+    def put_many(
+        self,
+        model_name: str,
+        instruction: str,
+        texts: List[str],
+        embeddings: np.ndarray,
+    ) -> None:
+        for text, embedding in zip(texts, embeddings):
+            key = self.key(model_name, instruction, text)
+            embedding = np.array(embedding, dtype=np.float32)
+            self.memory.put(key, embedding)
+            if self._disk is not None:
+                with self._disk_lock:
+                    self._disk[key] = embedding.tobytes()
+
+    def encode(
+        self,
+        model,
+        model_name: str,
+        texts: List[str],
+        instruction: str = "",
+        stats: Optional[CacheStats] = None,
+        **encode_kwargs,
+    ) -> np.ndarray:
+        """
+        Encode texts with model, only running the encoder on cache misses
+        Args:
+            model: SentenceTransformer-like model with an encode method
+            model_name: Name identifying the model in cache keys
+            texts: Texts to encode (without the instruction prefix)
+            instruction: Prefix prepended to every text before encoding
+            stats: Also receives this call's own hits and misses, which the
+                shared stats cannot attribute when calls overlap
+            encode_kwargs: Passed through to model.encode
+        Returns:
+            (len(texts), dim) float32 embeddings
+        """
+        found = self.get_many(model_name, instruction, texts, stats)
+        missing = list(
+            dict.fromkeys(text for text, emb in zip(texts, found) if emb is None)
+        )
+        if missing:
+            encoded = model.encode(
+                [instruction + text for text in missing], **encode_kwargs
+            )
+            self.put_many(model_name, instruction, missing, encoded)
+            by_text = dict(zip(missing, encoded))
+            found = [
+                by_text[text] if emb is None else emb for text, emb in zip(texts, found)
+            ]
+        if not found:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.stack(found).astype(np.float32, copy=False)
+
+    def _disk_get(self, key: str) -> Optional[np.ndarray]:
+        with self._disk_lock:
+            raw = self._disk.get(key)
+        if raw is None:
+            return None
+        return np.frombuffer(raw, dtype=np.float32).copy()
+
+    def close(self) -> None:
+        if self._disk is not None:
+            with self._disk_lock:
+                self._disk.close()
+            self._disk = None
@@ -9,17 +9,28 @@ def load_wiki_movies():
     return movies
 
 
-rag = RAG()
-movies = load_wiki_movies()[:100].tolist()
-rag.add_documents(movies)
-
-query = "The film opens with two bandits"
-
-results = rag.search(query, top_k=5)
-for i, (text, score) in enumerate(results, 1):
-    print(f"\nResult {i}:")
-    print(f"Score: {score:.4f}")
-    print(f"Text: {text[:200]}...")
+def report_progress(stats):
+    print(
+        f"\rIngested {stats.documents} docs, {stats.chunks} chunks "
+        f"({stats.chunks_per_s:.1f} chunks/s, {stats.tokens_per_s:.0f} tokens/s)",
+        end="",
+        flush=True,
+    )
+
+
+if __name__ == "__main__":
+    rag = RAG()
+    movies = load_wiki_movies()
+    rag.add_documents(movies, progress=report_progress)
+    print()
+
+    query = "The film opens with two bandits"
+
+    results = rag.search(query, top_k=5)
+    for i, (text, score) in enumerate(results, 1):
+        print(f"\nResult {i}:")
+        print(f"Score: {score:.4f}")
+        print(f"Text: {text[:200]}...")
 
 
 # if __name__ == "__main__":
@@ -1,7 +1,25 @@
-from sentence_transformers import SentenceTransformer, CrossEncoder
-from transformers import AutoTokenizer
-from typing import List, Tuple, Dict
+from bm25 import BM25Index, reciprocal_rank_fusion
+from cache import CacheStats, EmbeddingCache, LRUCache, content_key
+from dataclasses import dataclass
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+)
+from retrievers import ExactRetriever, Retriever
+from store import ChunkStore, _write_atomic
+from tracing import Tracer
+import json
 import numpy as np
+import os
+import queue
+import threading
 import time
 
 INSTRUCTIONS = {
@@ -32,18 +50,268 @@ INSTRUCTIONS = {
 }
 
 
+@dataclass
+class IngestStats:
+    """Progress and throughput counters for add_documents"""
+
+    documents: int = 0
+    skipped: int = 0
+    replaced: int = 0
+    chunks: int = 0
+    tokens: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def chunks_per_s(self) -> float:
+        return self.chunks / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def tokens_per_s(self) -> float:
+        return self.tokens / self.elapsed if self.elapsed > 0 else 0.0
+
+
+@dataclass
+class RerankStats:
+    """Cross-encoder work done and avoided by the score cache and adaptive depth"""
+
+    queries: int = 0
+    pairs_scored: int = 0
+    pairs_cached: int = 0
+    pairs_skipped: int = 0
+    seconds: float = 0.0
+
+    @property
+    def seconds_per_pair(self) -> float:
+        return self.seconds / self.pairs_scored if self.pairs_scored else 0.0
+
+    @property
+    def seconds_saved(self) -> float:
+        """Estimated cross-encoder time avoided, at the measured cost per pair"""
+        return (self.pairs_cached + self.pairs_skipped) * self.seconds_per_pair
+
+    @property
+    def seconds_saved_per_query(self) -> float:
+        return self.seconds_saved / self.queries if self.queries else 0.0
+
+    def add(self, other: "RerankStats") -> None:
+        self.queries += other.queries
+        self.pairs_scored += other.pairs_scored
+        self.pairs_cached += other.pairs_cached
+        self.pairs_skipped += other.pairs_skipped
+        self.seconds += other.seconds
+
+
+def _prefetch(iterable: Iterable, depth: int = 2) -> Iterator:
+    """
+    Drive an iterable on a worker thread and yield its items in order
+    Args:
+        iterable: Source to consume in the background
+        depth: Maximum number of items buffered ahead of the consumer
+    """
+    items = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def worker():
+        try:
+            for item in iterable:
+                if not put((False, item)):
+                    return
+            put((True, None))
+        except BaseException as e:
+            put((True, e))
+
+    threading.Thread(target=worker, daemon=True).start()
+    try:
+        while True:
+            finished, payload = items.get()
+            if finished:
+                if payload is not None:
+                    raise payload
+                return
+            yield payload
+    finally:
+        stop.set()
+
+
+def _model_name(model, default: str) -> str:
+    """
+    Name identifying a model in cache keys and the saved config
+    Args:
+        model: Preloaded model, or None when the default is loaded by name
+        default: Name used when no model is given
+    """
+    if model is None:
+        return default
+    for source in (model, getattr(model, "tokenizer", None)):
+        path = getattr(source, "name_or_path", None)
+        if isinstance(path, str) and path:
+            return path
+
+    name = f"{type(model).__module__}.{type(model).__qualname__}"
+    if hasattr(model, "get_sentence_embedding_dimension"):
+        dim = model.get_sentence_embedding_dimension()
+    else:
+        dim = getattr(model, "dim", None)
+    return name if dim is None else f"{name}-{dim}d"
+
+
 class RAG:
     def __init__(
         self,
-        base_model_name: str = "BAAI/bge-base-en-v1.5",
-        query_model_name: str = "BAAI/llm-embedder",
-        reranker_name="BAAI/bge-reranker-v2-m3",
+        base_model_name: Optional[str] = None,
+        query_model_name: Optional[str] = None,
+        reranker_name: Optional[str] = None,
+        embedding_dtype=np.float32,
+        retriever: Optional[Retriever] = None,
+        cache_size: int = 100_000,
+        cache_dir: Optional[str] = None,
+        document_cache_size: int = 0,
+        rerank_cache_size: int = 100_000,
+        rerank_margin: Optional[float] = None,
+        base_model=None,
+        query_model=None,
+        reranker=None,
+        tokenizer=None,
+        tracer: Optional[Tracer] = None,
+        compact_threshold: Optional[float] = 0.25,
+        hybrid: bool = False,
+        rrf_k: int = 60,
     ):
-        self.base_model = SentenceTransformer(base_model_name)
-        self.query_model = SentenceTransformer(query_model_name)
-        self.chunks: List[Dict] = []
-        self.tokenizer = AutoTokenizer.from_pretrained(base_model_name)
-        self.reranker = CrossEncoder(reranker_name)
+        """
+        Args:
+            base_model_name: Bi-encoder used for document chunks
+                (defaults to BAAI/bge-base-en-v1.5)
+            query_model_name: Bi-encoder used for queries
+                (defaults to BAAI/llm-embedder)
+            reranker_name: Cross-encoder used to rerank candidates
+                (defaults to BAAI/bge-reranker-v2-m3)
+            embedding_dtype: Storage dtype for chunk embeddings
+            retriever: First-stage retriever (defaults to exact search)
+            cache_size: Query embeddings kept in the in-memory cache
+            cache_dir: Directory for the on-disk query and chunk caches
+            document_cache_size: Chunk embeddings kept in memory. Off by
+                default, since the store already holds every ingested vector;
+                the on-disk tier still skips re-encoding unchanged chunks
+            rerank_cache_size: Cross-encoder scores kept in memory
+            rerank_margin: Only rerank and return candidates whose first-stage
+                score is within this margin of the top hit, so searches may
+                return fewer than rerank_k results (None reranks all of them)
+            base_model, query_model, reranker, tokenizer: Preloaded models
+                used instead of loading the named ones, e.g. small stand-ins.
+                Named models are loaded on first use, so an instance that
+                never encodes or reranks never imports them. Without an
+                explicit name, a preloaded model is named after its checkpoint
+                or class and dimension, since names key the embedding cache
+            tracer: Receives per-stage timings and counters for every search
+                (defaults to a no-op tracer)
+            compact_threshold: Fraction of deleted chunks that triggers a
+                background compaction (None disables it)
+            hybrid: Build a BM25 index during ingest and fuse lexical and
+                dense candidates with reciprocal rank fusion before reranking
+            rrf_k: Reciprocal rank fusion damping constant
+        """
+        self.base_model_name = base_model_name or _model_name(
+            base_model, "BAAI/bge-base-en-v1.5"
+        )
+        self.query_model_name = query_model_name or _model_name(
+            query_model, "BAAI/llm-embedder"
+        )
+        self.reranker_name = reranker_name or _model_name(
+            reranker, "BAAI/bge-reranker-v2-m3"
+        )
+        self._base_model = base_model
+        self._query_model = query_model
+        self._reranker = reranker
+        self._tokenizer = tokenizer
+        self._model_lock = threading.Lock()
+        self.chunks = ChunkStore(dtype=embedding_dtype)
+        self.retriever = retriever if retriever is not None else ExactRetriever()
+        self.embedding_cache = EmbeddingCache(cache_size, cache_dir)
+        self.document_cache = EmbeddingCache(
+            document_cache_size, cache_dir, name="documents"
+        )
+        self.score_cache = LRUCache(rerank_cache_size)
+        self.rerank_margin = rerank_margin
+        self.rerank_stats = RerankStats()
+        self._stats_lock = threading.Lock()
+        self.tracer = tracer if tracer is not None else Tracer()
+        self.compact_threshold = compact_threshold
+        self.bm25 = BM25Index() if hybrid else None
+        self.rrf_k = rrf_k
+        # Writers hold _write_lock; swapping the store or retriever state also
+        # takes _index_lock, which searches hold while scoring
+        self._write_lock = threading.RLock()
+        self._index_lock = threading.Lock()
+        self._compaction: Optional[threading.Thread] = None
+
+    def _lazy(self, name: str, load: Callable):
+        """Return the model stored in attribute name, loading it on first use"""
+        model = getattr(self, name)
+        if model is None:
+            with self._model_lock:
+                model = getattr(self, name)
+                if model is None:
+                    model = load()
+                    setattr(self, name, model)
+        return model
+
+    @property
+    def base_model(self):
+        """Bi-encoder for document chunks"""
+
+        def load():
+            from sentence_transformers import SentenceTransformer
+
+            return SentenceTransformer(self.base_model_name)
+
+        return self._lazy("_base_model", load)
+
+    @property
+    def query_model(self):
+        """Bi-encoder for queries"""
+
+        def load():
+            from sentence_transformers import SentenceTransformer
+
+            return SentenceTransformer(self.query_model_name)
+
+        return self._lazy("_query_model", load)
+
+    @property
+    def reranker(self):
+        """Cross-encoder for reranking"""
+
+        def load():
+            from sentence_transformers import CrossEncoder
+
+            return CrossEncoder(self.reranker_name)
+
+        return self._lazy("_reranker", load)
+
+    @property
+    def tokenizer(self):
+        """Fast tokenizer of the base model, used for chunking and BM25"""
+
+        def load():
+            # A preloaded encoder carries its own tokenizer, and its derived
+            # name may not be a loadable checkpoint
+            if getattr(self._base_model, "tokenizer", None) is not None:
+                return self._base_model.tokenizer
+
+            from transformers import AutoTokenizer
+
+            return AutoTokenizer.from_pretrained(self.base_model_name)
+
+        return self._lazy("_tokenizer", load)
 
     def chunk(self, text: str, chunk_size: int = 192, overlap: float = 0.85):
         """
@@ -53,47 +321,312 @@ class RAG:
             chunk_size: Maximum tokens per chunk
             overlap: Overlap between chunks (0.75 = 75% overlap)
         """
-        tokens = self.tokenizer.encode(text, add_special_tokens=False)
+        return [
+            text[start:end]
+            for start, end, _ in self._chunk_spans(text, chunk_size, overlap)
+        ]
 
-        # Calculate stride based on overlap
-        stride = int(chunk_size * (1 - overlap))
+    def _chunk_spans(
+        self, text: str, chunk_size: int = 192, overlap: float = 0.85
+    ) -> List[Tuple[int, int, List[int]]]:
+        """
+        Sliding window chunks as (start, end, token_ids) character spans
+
+        One tokenization is shared by every window, and the fast tokenizer's
+        offset mapping turns token windows into slices of the original string,
+        so no window is ever decoded back to text. The token ids are kept for
+        the BM25 index.
+        """
+        encoding = self.tokenizer(
+            text, add_special_tokens=False, return_offsets_mapping=True
+        )
+        tokens, offsets = encoding["input_ids"], encoding["offset_mapping"]
 
-        chunks = []
-        for i in range(0, len(tokens), stride):
-            # Get chunk tokens
-            chunk_tokens = tokens[i : i + chunk_size]
+        # Calculate stride based on overlap
+        stride = max(1, int(chunk_size * (1 - overlap)))
 
-            # Decode chunk back to text
-            chunk_text = self.tokenizer.decode(chunk_tokens, skip_special_tokens=True)
-            chunks.append(chunk_text)
+        spans = []
+        for i in range(0, len(offsets), stride):
+            # Last token in this window
+            last = min(i + chunk_size, len(offsets)) - 1
+            spans.append((offsets[i][0], offsets[last][1], tokens[i : last + 1]))
 
             # Stop if we've processed all tokens
-            if i + chunk_size >= len(tokens):
+            if i + chunk_size >= len(offsets):
                 break
 
-        return chunks
+        return spans
 
-    def add_documents(self, documents: List[str]) -> None:
+    def save(self, path: str) -> None:
+        """
+        Persist the index so it can be reopened without re-encoding
+        Args:
+            path: Directory to write the index to
+        """
+        with self._write_lock:
+            self.chunks.save(path)
+            if self.bm25 is not None:
+                self.bm25.save(os.path.join(path, "bm25.npz"))
+        # Every file is renamed into place and config.json comes last, so
+        # saving over the directory this index was mapped from is safe
+        config = json.dumps(
+            {
+                "base_model_name": self.base_model_name,
+                "query_model_name": self.query_model_name,
+                "reranker_name": self.reranker_name,
+                "hybrid": self.bm25 is not None,
+                "rrf_k": self.rrf_k,
+            }
+        ).encode("utf-8")
+        _write_atomic(os.path.join(path, "config.json"), lambda f: f.write(config))
+
+    @classmethod
+    def load(
+        cls,
+        path: str,
+        mmap: bool = True,
+        retriever: Optional[Retriever] = None,
+        **kwargs,
+    ) -> "RAG":
+        """
+        Reopen an index written by save
+        Args:
+            path: Directory passed to save
+            mmap: Memory-map the embedding matrix read-only, so several
+                processes share one page-cached copy
+            retriever: First-stage retriever (defaults to exact search)
+            kwargs: Other RAG arguments, e.g. preloaded models
+        """
+        with open(os.path.join(path, "config.json")) as f:
+            config = json.load(f)
+        config.update(kwargs)
+        chunks = ChunkStore.load(path, mmap=mmap)
+        rag = cls(**config, embedding_dtype=chunks.dtype, retriever=retriever)
+        rag.chunks = chunks
+        bm25_path = os.path.join(path, "bm25.npz")
+        if rag.bm25 is not None and os.path.exists(bm25_path):
+            rag.bm25 = BM25Index.load(bm25_path)
+        elif rag.bm25 is not None:
+            # Saved without hybrid, so index the stored chunk texts, dead rows
+            # included to keep row ids aligned with the store
+            rag.bm25.add(
+                0, (rag._token_ids(chunks.text(i)) for i in range(len(chunks)))
+            )
+        return rag
+
+    def add_documents(
+        self,
+        documents: Iterable[str],
+        ids: Optional[Iterable[str]] = None,
+        batch_size: int = 64,
+        pool_size: int = 16,
+        progress: Optional[Callable[[IngestStats], None]] = None,
+    ) -> IngestStats:
         """
         Process and store documents with embeddings
+
+        Documents are chunked lazily on a worker thread while the main thread
+        encodes. Chunks are pooled across document boundaries and encoded in
+        fixed-size batches sorted by token length, so short documents do not
+        turn into tiny encoder calls.
+        Args:
+            documents: Iterable of document texts to add
+            ids: Stable document ids, one per document (generated when None,
+                skipping ids already in use); existing ids are upserted as in
+                upsert_documents. Raises ValueError if the lengths differ
+            batch_size: Number of chunks per encoder call
+            pool_size: Number of batches pooled before length sorting
+            progress: Optional callback receiving IngestStats after each pool
+        Returns:
+            IngestStats with chunk and token throughput
+        """
+        if ids is None:
+            items = ((None, doc) for doc in documents)
+        else:
+            items = zip(ids, documents, strict=True)
+        return self._ingest(items, batch_size, pool_size, progress)
+
+    def upsert_documents(
+        self,
+        documents: Union[Mapping[str, str], Iterable[Tuple[str, str]]],
+        batch_size: int = 64,
+        pool_size: int = 16,
+        progress: Optional[Callable[[IngestStats], None]] = None,
+    ) -> IngestStats:
+        """
+        Insert or replace documents by id
+
+        Documents whose content hash matches the stored one are skipped
+        without re-chunking or re-encoding. Changed documents have their old
+        chunks tombstoned and new ones appended, with no index rebuild.
         Args:
-            documents: List of document texts to add
+            documents: Mapping or iterable of (doc_id, text) pairs
+            batch_size: Number of chunks per encoder call
+            pool_size: Number of batches pooled before length sorting
+            progress: Optional callback receiving IngestStats after each pool
+        Returns:
+            IngestStats, with unchanged documents counted in skipped
+        """
+        items = documents.items() if isinstance(documents, Mapping) else documents
+        return self._ingest(items, batch_size, pool_size, progress)
+
+    def delete_documents(self, ids: Iterable[str]) -> int:
+        """
+        Remove documents from search
+        Args:
+            ids: Document ids to delete, unknown ids are ignored
+        Returns:
+            Number of documents deleted
         """
-        for doc in documents:
-            chunks = self.chunk(doc)
+        with self._write_lock:
+            deleted = self.chunks.delete_documents(ids)
+        self._maybe_compact()
+        return deleted
+
+    def compact(self) -> None:
+        """Rebuild the chunk store without deleted rows and remap the retriever"""
+        with self._write_lock:
+            if not self.chunks.dead_fraction:
+                return
+            chunks, remap = self.chunks.compacted()
+            with self._index_lock:
+                self.chunks = chunks
+                self.retriever.compact(remap)
+                if self.bm25 is not None:
+                    self.bm25.compact(remap)
+
+    def _maybe_compact(self) -> None:
+        """Start a background compaction once enough chunks are dead"""
+        if self.compact_threshold is None:
+            return
+        if self.chunks.dead_fraction < self.compact_threshold:
+            return
+        if self._compaction is not None and self._compaction.is_alive():
+            return
+        self._compaction = threading.Thread(target=self.compact, daemon=True)
+        self._compaction.start()
+
+    def _ingest(
+        self,
+        items: Iterable[Tuple[Optional[str], str]],
+        batch_size: int,
+        pool_size: int,
+        progress: Optional[Callable[[IngestStats], None]],
+    ) -> IngestStats:
+        stats = IngestStats()
+        start = time.perf_counter()
+
+        for pool in _prefetch(self._chunk_pools(items, batch_size * pool_size)):
+            # Last occurrence wins when an id repeats within a pool
+            fresh = {}
+            for i, (key, doc, content_hash, spans) in enumerate(pool):
+                if spans is None or self.chunks.content_hash(key) == content_hash:
+                    continue
+                fresh[i if key is None else key] = (key, doc, content_hash, spans)
+            fresh = list(fresh.values())
+            stats.skipped += len(pool) - len(fresh)
+
+            texts, lengths, starts, ends, positions = [], [], [], [], []
+            token_ids = []
+            for position, (_, doc, _, spans) in enumerate(fresh):
+                for start_char, end_char, tokens in spans:
+                    texts.append(doc[start_char:end_char])
+                    lengths.append(len(tokens))
+                    token_ids.append(tokens)
+                    starts.append(start_char)
+                    ends.append(end_char)
+                    positions.append(position)
+
+            embeddings = self._encode_sorted(texts, lengths, batch_size)
+
+            with self._write_lock:
+                # Settle every key before touching the store, so a failure
+                # cannot leave a document registered without its rows
+                keys = [
+                    self.chunks.new_key() if key is None else key for key, *_ in fresh
+                ]
+                if len(set(keys)) != len(keys):
+                    raise ValueError("Generated document id collides with a given id")
+                replaced = [key for key, *_ in fresh if key in self.chunks]
+                stats.replaced += self.chunks.delete_documents(replaced)
+                slots = [
+                    self.chunks.add_document(
+                        doc, {"source_doc": doc[:100]}, key, content_hash
+                    )
+                    for key, (_, doc, content_hash, _) in zip(keys, fresh)
+                ]
+                doc_ids = np.asarray(slots, dtype=np.int64)[positions]
+                first_row = len(self.chunks)
+                self.chunks.append(embeddings, starts, ends, doc_ids)
+                if self.bm25 is not None:
+                    self.bm25.add(first_row, token_ids)
+
+            stats.documents += len(fresh)
+            stats.chunks += len(texts)
+            stats.tokens += sum(lengths)
+            stats.elapsed = time.perf_counter() - start
+            if progress is not None:
+                progress(stats)
+
+        self._maybe_compact()
+        return stats
+
+    def _chunk_pools(
+        self, items: Iterable[Tuple[Optional[str], str]], pool_chunks: int
+    ) -> Iterator[List[Tuple[Optional[str], str, str, Optional[List]]]]:
+        """
+        Group (doc_id, doc, content_hash, spans) entries until at least
+        pool_chunks chunks are collected. Documents whose stored content hash
+        already matches are passed through with spans None, unchunked.
+        """
+        pool, n_chunks = [], 0
+        for key, doc in items:
+            content_hash = content_key(doc)
+            if key is not None and self.chunks.content_hash(key) == content_hash:
+                pool.append((key, doc, content_hash, None))
+                continue
+            spans = self._chunk_spans(doc)
+            pool.append((key, doc, content_hash, spans))
+            n_chunks += len(spans)
+            if n_chunks >= pool_chunks:
+                yield pool
+                pool, n_chunks = [], 0
+        if pool:
+            yield pool
+
+    def _encode_sorted(
+        self, texts: List[str], lengths: List[int], batch_size: int
+    ) -> np.ndarray:
+        """Encode cache misses in length-sorted batches, returning rows in input order"""
+        if not texts:
+            return np.empty((0, self.chunks.dim or 0), dtype=np.float32)
+
+        found = self.document_cache.get_many(self.base_model_name, "", texts)
+
+        # Unique missing texts, longest first
+        missing = {}
+        for i in np.argsort(-np.asarray(lengths), kind="stable"):
+            if found[i] is None:
+                missing.setdefault(texts[i], None)
+        missing = list(missing)
+
+        encoded = {}
+        for i in range(0, len(missing), batch_size):
+            batch = missing[i : i + batch_size]
             embeddings = self.base_model.encode(
-                chunks,
+                batch,
+                batch_size=batch_size,
                 normalize_embeddings=True,
                 convert_to_numpy=True,
+                show_progress_bar=False,
             )
-            for chunk_text, embedding in zip(chunks, embeddings):
-                self.chunks.append(
-                    {
-                        "text": chunk_text,
-                        "embedding": embedding,
-                        "metadata": {"source_doc": doc[:100]},
-                    }
-                )
+            self.document_cache.put_many(self.base_model_name, "", batch, embeddings)
+            encoded.update(zip(batch, embeddings))
+
+        rows = [
+            encoded[text] if emb is None else emb for text, emb in zip(texts, found)
+        ]
+        return np.stack(rows).astype(np.float32, copy=False)
 
     def search(
         self,
@@ -111,35 +644,110 @@ class RAG:
         Returns:
             List of (chunk_text, similarity_score) tuples
         """
+        return self.search_batch([query], top_k, rerank_k, instruction)[0]
+
+    def search_batch(
+        self,
+        queries: List[str],
+        top_k: int = 5,
+        rerank_k: int = 5,
+        instruction: Dict[str, str] = INSTRUCTIONS["qa"],
+    ) -> List[List[Tuple[str, float]]]:
+        """
+        Search for many queries at once
+
+        Queries are encoded in one call, scored with a single matrix product,
+        and every (query, passage) pair goes to the cross-encoder as one batch.
+        Args:
+            queries: Search queries
+            top_k: Number of first-stage candidates per query
+            rerank_k: Number of results to return per query after reranking
+            instruction: Instruction pair from INSTRUCTIONS
+        Returns:
+            One list of (chunk_text, relevance_score) tuples per query, with
+            fewer than rerank_k entries when rerank_margin cuts candidates
+        """
         if not self.chunks:
             raise ValueError("No documents added. Please add documents first")
-        now = time.time()
+        if not queries:
+            return []
 
-        query_embedding = self.query_model.encode(
-            instruction["query"] + query,
-            normalize_embeddings=True,
-            convert_to_numpy=True,
-        )
+        trace = self.tracer.begin()
+        trace.count("queries", len(queries))
 
-        chunk_embeddings = np.array([chunk["embedding"] for chunk in self.chunks])
+        # Counts come from this call's own lookups, since the shared
+        # counters also move with any search running concurrently
+        query_lookups = CacheStats()
+        with trace.stage("query_encode"):
+            query_embeddings = self.embedding_cache.encode(
+                self.query_model,
+                self.query_model_name,
+                queries,
+                instruction=instruction["query"],
+                stats=query_lookups,
+                normalize_embeddings=True,
+                convert_to_numpy=True,
+                show_progress_bar=False,
+            )
+        trace.count("query_cache_hits", query_lookups.hits + query_lookups.disk_hits)
+        trace.count("query_cache_misses", query_lookups.misses)
 
-        similarities = query_embedding @ chunk_embeddings.T
+        # Hold the index lock so a compaction cannot swap the store between
+        # indexing and scoring; chunks stays consistent with the row ids
+        with self._index_lock:
+            chunks = self.chunks
+            embeddings, mask = chunks.embeddings, chunks.live_mask
+            if mask is not None:
+                mask = mask[: len(embeddings)]
+            with trace.stage("index"):
+                self.retriever.index(embeddings)
+            scores, indices = self.retriever.search(
+                query_embeddings, top_k, trace, mask
+            )
+            if self.bm25 is not None:
+                with trace.stage("lexical"):
+                    lexical = [
+                        self.bm25.search(self._token_ids(query), top_k, mask)[1]
+                        for query in queries
+                    ]
+        trace.count("candidates", int((indices >= 0).sum()))
 
-        # Get top-k indices
-        top_indices = np.argsort(similarities)[-top_k:][::-1]
+        if self.bm25 is not None:
+            trace.count("lexical_candidates", sum(len(rows) for rows in lexical))
+            with trace.stage("fusion"):
+                indices = [
+                    reciprocal_rank_fusion([dense, rows], self.rrf_k)[:top_k]
+                    for dense, rows in zip(indices, lexical)
+                ]
 
-        # Build results
-        search_results = []
-        for i in top_indices:
-            search_results.append((self.chunks[i]["text"], float(similarities[i])))
+        passages, n_skipped = [], 0
+        for row_scores, row in zip(scores, indices):
+            found = row >= 0
+            rerank = found
+            # Fused rankings have no comparable similarity, so the adaptive
+            # margin only applies to dense-only search
+            if self.rerank_margin is not None and self.bm25 is None and found.any():
+                rerank = found & (row_scores >= row_scores[0] - self.rerank_margin)
+            passages.append([chunks.text(i) for i in row[rerank]])
+            n_skipped += int((found & ~rerank).sum())
 
-        passages = [result[0] for result in search_results]
-        rerank_results = self.rerank(query, passages)
-        end = time.time()
+        # Candidates outside the margin are dropped rather than returned with
+        # a first-stage similarity that is not comparable to reranker scores
+        with self._stats_lock:
+            self.rerank_stats.pairs_skipped += n_skipped
+        rerank_work = RerankStats()
+        with trace.stage("rerank"):
+            rerank_results = self.rerank_batch(queries, passages, stats=rerank_work)
+        trace.count("rerank_cache_hits", rerank_work.pairs_cached)
+        trace.count("rerank_cache_misses", rerank_work.pairs_scored)
+        trace.count("rerank_skipped", n_skipped)
 
-        print(f"Time taken: {end - now:.2f}s")
+        results = [ranked[:rerank_k] for ranked in rerank_results]
+        self.tracer.finish(trace)
+        return results
 
-        return rerank_results[:rerank_k]
+    def _token_ids(self, text: str) -> List[int]:
+        return self.tokenizer(text, add_special_tokens=False)["input_ids"]
 
     def rerank(self, query: str, passages: List[str]) -> List[Tuple[str, float]]:
         """
@@ -148,11 +756,73 @@ class RAG:
             query: Search query
             passages: List of passages to rerank
         Returns:
-            List of (passage, relevance_score) tuples
+            List of (passage, relevance_score) tuples, best first
+        """
+        return self.rerank_batch([query], [passages])[0]
+
+    def rerank_batch(
+        self,
+        queries: List[str],
+        passages: List[List[str]],
+        batch_size: int = 32,
+        stats: Optional[RerankStats] = None,
+    ) -> List[List[Tuple[str, float]]]:
+        """
+        Rerank passages for many queries with a single cross-encoder call
+        Args:
+            queries: Search queries
+            passages: Passages to rerank, one list per query
+            batch_size: Pairs per cross-encoder forward pass
+            stats: Also receives this call's own work, which rerank_stats
+                cannot attribute when calls overlap
+        Returns:
+            One list of (passage, relevance_score) tuples per query, best first
         """
-        rankings = self.reranker.rank(query, passages)
+        pairs = [
+            (query, passage)
+            for query, group in zip(queries, passages)
+            for passage in group
+        ]
+        call = RerankStats(queries=len(queries))
 
-        results = []
-        for passage, ranking in zip(passages, rankings):
-            results.append((passage, float(ranking["score"])))
+        keys = [content_key(query, passage) for query, passage in pairs]
+        scores = [self.score_cache.get(key) for key in keys]
+        missing = {}
+        for key, pair, score in zip(keys, pairs, scores):
+            if score is None:
+                missing.setdefault(key, pair)
+        call.pairs_cached = len(pairs) - len(missing)
+
+        if missing:
+            start = time.perf_counter()
+            predicted = self.reranker.predict(
+                list(missing.values()),
+                batch_size=batch_size,
+                convert_to_numpy=True,
+                show_progress_bar=False,
+            )
+            call.seconds = time.perf_counter() - start
+            call.pairs_scored = len(missing)
+
+            predicted = dict(zip(missing, (float(score) for score in predicted)))
+            for key, score in predicted.items():
+                self.score_cache.put(key, score)
+            scores = [
+                predicted[key] if score is None else score
+                for key, score in zip(keys, scores)
+            ]
+
+        with self._stats_lock:
+            self.rerank_stats.add(call)
+        if stats is not None:
+            stats.add(call)
+
+        results, start = [], 0
+        for group in passages:
+            group_scores = scores[start : start + len(group)]
+            start += len(group)
+            ranked = sorted(
+                zip(group, group_scores), key=lambda item: item[1], reverse=True
+            )
+            results.append([(passage, float(score)) for passage, score in ranked])
         return results
@@ -0,0 +1,295 @@
+from tracing import NULL_TRACE
+from typing import Optional, Tuple
+import numpy as np
+import warnings
+
+
+class Retriever:
+    """
+    First-stage retrieval over a chunk embedding matrix
+
+    index is called with the current embedding matrix before every search.
+    Rows are only appended between compactions, so implementations can index
+    new rows incrementally. search returns (scores, indices) of shape
+    (n_queries, k) in descending score order, padded with -inf / -1 when
+    fewer than k candidates are found. Rows where mask is False are never
+    returned. The optional trace receives "scoring" and "top_k" timings.
+    """
+
+    def index(self, embeddings: np.ndarray) -> None:
+        raise NotImplementedError
+
+    def search(
+        self,
+        query_embeddings: np.ndarray,
+        k: int,
+        trace=NULL_TRACE,
+        mask: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        """Forget all indexed rows"""
+        raise NotImplementedError
+
+    def compact(self, remap: np.ndarray) -> None:
+        """
+        Follow a store compaction
+        Args:
+            remap: New row for every old row, -1 for dropped rows
+        """
+        self.reset()
+
+
+def _top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sorted top-k along the last axis, padded to k with -inf / -1
+
+    Uses argpartition so only the k selected scores get sorted, O(N + k log k)
+    per query instead of a full O(N log N) sort.
+    """
+    n_queries, n = scores.shape
+    top_scores = np.full((n_queries, k), -np.inf, dtype=np.float32)
+    top_indices = np.full((n_queries, k), -1, dtype=np.int64)
+    k_found = min(k, n)
+    if k_found == 0:
+        return top_scores, top_indices
+
+    if k_found < n:
+        candidates = np.argpartition(-scores, k_found - 1, axis=1)[:, :k_found]
+    else:
+        candidates = np.broadcast_to(np.arange(n), (n_queries, n))
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1)
+
+    top_scores[:, :k_found] = np.take_along_axis(candidate_scores, order, axis=1)
+    top_indices[:, :k_found] = np.take_along_axis(candidates, order, axis=1)
+    top_indices[top_scores == -np.inf] = -1
+    return top_scores, top_indices
+
+
+def _inner_products(
+    query_embeddings: np.ndarray, embeddings: np.ndarray, block: int = 65536
+) -> np.ndarray:
+    """
+    (n_queries, n_rows) float32 scores
+
+    NumPy has no BLAS path for float16, so float16 rows are upcast in blocks
+    to keep the matmul on BLAS while bounding the temporary copy.
+    """
+    query_embeddings = query_embeddings.astype(np.float32, copy=False)
+    if embeddings.dtype == np.float32:
+        return query_embeddings @ embeddings.T
+    scores = np.empty((len(query_embeddings), len(embeddings)), dtype=np.float32)
+    for start in range(0, len(embeddings), block):
+        rows = embeddings[start : start + block].astype(np.float32)
+        scores[:, start : start + block] = query_embeddings @ rows.T
+    return scores
+
+
+class ExactRetriever(Retriever):
+    """Brute-force inner product scan, the reference backend"""
+
+    def __init__(self):
+        self._embeddings: Optional[np.ndarray] = None
+
+    def index(self, embeddings: np.ndarray) -> None:
+        self._embeddings = embeddings
+
+    def search(
+        self,
+        query_embeddings: np.ndarray,
+        k: int,
+        trace=NULL_TRACE,
+        mask: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        if self._embeddings is None:
+            raise ValueError("Retriever has no indexed embeddings")
+        with trace.stage("scoring"):
+            scores = _inner_products(query_embeddings, self._embeddings)
+            if mask is not None:
+                scores[:, ~mask] = -np.inf
+        with trace.stage("top_k"):
+            return _top_k(scores, k)
+
+    def reset(self) -> None:
+        self._embeddings = None
+
+
+class IVFRetriever(Retriever):
+    """
+    Inverted file index with a spherical k-means coarse quantizer
+
+    The quantizer is trained on the rows present at the first index call.
+    Rows appended later are assigned to the nearest existing centroid, and
+    the quantizer is retrained once the row count passes retrain_factor times
+    the size it was trained at (or a warning is issued when auto_retrain is
+    off), so an early search on a streaming ingest does not fix a handful of
+    lists forever.
+    """
+
+    def __init__(
+        self,
+        n_lists: Optional[int] = None,
+        nprobe: int = 8,
+        n_iter: int = 10,
+        max_train_size: int = 65536,
+        seed: int = 0,
+        retrain_factor: float = 4.0,
+        auto_retrain: bool = True,
+    ):
+        """
+        Args:
+            n_lists: Number of inverted lists (defaults to 4 * sqrt(n_rows))
+            nprobe: Number of lists scanned per query
+            n_iter: K-means iterations when training
+            max_train_size: Rows sampled to train the quantizer
+            seed: Random seed for sampling and initialization
+            retrain_factor: Growth over the trained row count past which the
+                lists are considered stale
+            auto_retrain: Retrain stale lists on the next index call instead
+                of only warning
+        """
+        self.n_lists = n_lists
+        self.nprobe = nprobe
+        self.n_iter = n_iter
+        self.max_train_size = max_train_size
+        self.seed = seed
+        self.retrain_factor = retrain_factor
+        self.auto_retrain = auto_retrain
+        self.reset()
+
+    def reset(self) -> None:
+        self.centroids: Optional[np.ndarray] = None
+        self._trained_size = 0
+        self._warned = False
+        self._embeddings: Optional[np.ndarray] = None
+        self._assignments = np.empty(0, dtype=np.int32)
+        self._list_order: Optional[np.ndarray] = None
+        self._list_offsets: Optional[np.ndarray] = None
+
+    def train(self, embeddings: np.ndarray) -> None:
+        """
+        Fit the coarse quantizer and reassign every row
+        Args:
+            embeddings: (n, dim) normalized embeddings
+        """
+        rng = np.random.default_rng(self.seed)
+        n = len(embeddings)
+        n_lists = self.n_lists or max(1, int(4 * np.sqrt(n)))
+        n_lists = min(n_lists, n)
+
+        sample_size = min(n, max(self.max_train_size, n_lists))
+        sample = embeddings[np.sort(rng.choice(n, sample_size, replace=False))]
+        sample = sample.astype(np.float32)
+
+        centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+        for _ in range(self.n_iter):
+            assignments = _assign(sample, centroids)
+            counts = np.bincount(assignments, minlength=n_lists)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+
+            # Reseed empty lists from random sample rows
+            empty = counts == 0
+            sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = sums / np.maximum(norms, 1e-12)
+
+        self.centroids = centroids
+        self._trained_size = n
+        self._warned = False
+        self._embeddings = embeddings
+        self._assignments = _assign(embeddings, centroids)
+        self._list_order = None
+
+    def index(self, embeddings: np.ndarray) -> None:
+        if len(embeddings) == 0:
+            return
+        if self.centroids is None:
+            self.train(embeddings)
+            return
+        if len(embeddings) > self.retrain_factor * self._trained_size:
+            if self.auto_retrain:
+                self.train(embeddings)
+                return
+            if not self._warned:
+                warnings.warn(
+                    f"IVF quantizer was trained on {self._trained_size} rows but "
+                    f"indexes {len(embeddings)}, call train to rebuild the lists"
+                )
+                self._warned = True
+
+        self._embeddings = embeddings
+        n_indexed = len(self._assignments)
+        if len(embeddings) < n_indexed:
+            # Rows were dropped without compact, so reassign everything
+            self._assignments = _assign(embeddings, self.centroids)
+            self._list_order = None
+        elif len(embeddings) > n_indexed:
+            new = _assign(embeddings[n_indexed:], self.centroids)
+            self._assignments = np.concatenate([self._assignments, new])
+            self._list_order = None
+
+    def compact(self, remap: np.ndarray) -> None:
+        """Drop compacted rows from the lists, keeping the trained quantizer"""
+        if self.centroids is None:
+            return
+        self._assignments = self._assignments[remap[: len(self._assignments)] >= 0]
+        self._embeddings = None
+        self._list_order = None
+
+    def _lists(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Row ids grouped by list (CSR order, offsets), rebuilt after appends"""
+        if self._list_order is None:
+            self._list_order = np.argsort(self._assignments, kind="stable")
+            counts = np.bincount(self._assignments, minlength=len(self.centroids))
+            self._list_offsets = np.concatenate([[0], np.cumsum(counts)])
+        return self._list_order, self._list_offsets
+
+    def search(
+        self,
+        query_embeddings: np.ndarray,
+        k: int,
+        trace=NULL_TRACE,
+        mask: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        if self.centroids is None:
+            raise ValueError("Retriever has no indexed embeddings")
+        order, offsets = self._lists()
+        query_embeddings = query_embeddings.astype(np.float32)
+
+        nprobe = min(self.nprobe, len(self.centroids))
+        with trace.stage("coarse"):
+            coarse = query_embeddings @ self.centroids.T
+            probes = np.argpartition(-coarse, nprobe - 1, axis=1)[:, :nprobe]
+
+        top_scores = np.full((len(query_embeddings), k), -np.inf, dtype=np.float32)
+        top_indices = np.full((len(query_embeddings), k), -1, dtype=np.int64)
+        for q, lists in enumerate(probes):
+            candidates = np.concatenate(
+                [order[offsets[l] : offsets[l + 1]] for l in lists]
+            )
+            if mask is not None:
+                candidates = candidates[mask[candidates]]
+            if len(candidates) == 0:
+                continue
+            with trace.stage("scoring"):
+                vectors = self._embeddings[candidates].astype(np.float32)
+                scores = vectors @ query_embeddings[q]
+            with trace.stage("top_k"):
+                scores, picked = _top_k(scores[None], k)
+            top_scores[q] = scores[0]
+            top_indices[q] = np.where(picked[0] >= 0, candidates[picked[0]], -1)
+        return top_scores, top_indices
+
+
+def _assign(
+    embeddings: np.ndarray, centroids: np.ndarray, block: int = 65536
+) -> np.ndarray:
+    """Nearest centroid by inner product, computed in row blocks to bound memory"""
+    assignments = np.empty(len(embeddings), dtype=np.int32)
+    for start in range(0, len(embeddings), block):
+        rows = embeddings[start : start + block].astype(np.float32)
+        assignments[start : start + block] = np.argmax(rows @ centroids.T, axis=1)
+    return assignments
@@ -0,0 +1,182 @@
+from concurrent.futures import Executor, ThreadPoolExecutor
+from rag import INSTRUCTIONS, RAG
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import time
+
+# Queued by close to stop the dispatcher after the requests ahead of it
+_STOP = object()
+
+
+class AsyncRAG:
+    """
+    Asyncio front end that micro-batches concurrent searches
+
+    Incoming queries are queued and grouped into batches of at most
+    max_batch_size, waiting no longer than max_wait_ms after the first query
+    of a batch arrives. Each batch runs through RAG.search_batch on an
+    executor, so the event loop never blocks on the models. The default
+    executor has a single worker, so model calls never run concurrently.
+    Batching is what provides the throughput. A new batch is only formed
+    once a slot is free, so queries that arrive while the models are busy
+    join the next batch instead of queueing as small ones.
+
+    Usage:
+        async with AsyncRAG(rag) as server:
+            results = await server.search("The film opens with two bandits")
+    """
+
+    def __init__(
+        self,
+        rag: RAG,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        executor: Optional[Executor] = None,
+        max_inflight: int = 1,
+    ):
+        """
+        Args:
+            rag: Index to serve
+            max_batch_size: Maximum queries per search_batch call
+            max_wait_ms: Longest a queued query waits for its batch to fill
+            executor: Runs search_batch (defaults to one worker thread)
+            max_inflight: Batches submitted to the executor at once
+        """
+        self.rag = rag
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._owns_executor = executor is None
+        self.executor = executor
+        self.max_inflight = max_inflight
+        self._queue: Optional[asyncio.Queue] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._inflight = set()
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self) -> "AsyncRAG":
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    def start(self) -> None:
+        """Start the batching task on the running event loop"""
+        if self.executor is None:
+            # Owned executors are shut down by close, so each start makes one
+            self.executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="rag-batch"
+            )
+        if self._dispatcher is None:
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_inflight)
+            self._dispatcher = asyncio.get_running_loop().create_task(self._dispatch())
+
+    async def close(self) -> None:
+        """Serve searches queued so far, wait for them and stop the dispatcher"""
+        if self._dispatcher is not None:
+            # A sentinel rather than cancel: on Python 3.11, wait_for can
+            # swallow a cancellation that lands as queue.get returns an item
+            self._queue.put_nowait(_STOP)
+            await self._dispatcher
+            self._dispatcher = None
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+        # Fail anything still queued rather than leaving callers hanging
+        while self._queue is not None and not self._queue.empty():
+            *_, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("AsyncRAG closed"))
+        if self._owns_executor and self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
+    async def search(
+        self,
+        query: str,
+        top_k: int = 5,
+        rerank_k: int = 5,
+        instruction: Dict[str, str] = INSTRUCTIONS["qa"],
+    ) -> List[Tuple[str, float]]:
+        """
+        Search for relevant chunks, sharing model calls with concurrent callers
+        Args:
+            query: Search query
+            top_k: Number of first-stage candidates
+            rerank_k: Number of results to return after reranking
+            instruction: Instruction pair from INSTRUCTIONS
+        Returns:
+            List of (chunk_text, relevance_score) tuples for this query only
+        """
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((query, top_k, rerank_k, instruction, future))
+        return await future
+
+    async def _dispatch(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            await self._slots.acquire()
+            request = await self._queue.get()
+            if request is _STOP:
+                self._slots.release()
+                return
+
+            batch = [request]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    request = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if request is _STOP:
+                    stopping = True
+                    break
+                batch.append(request)
+
+            task = loop.create_task(self._run_batch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+            task.add_done_callback(lambda _: self._slots.release())
+
+    async def _run_batch(self, batch: List[tuple]) -> None:
+        # search_batch shares top_k, rerank_k and instruction across the
+        # batch, so requests with different settings run as separate calls
+        groups = {}
+        for request in batch:
+            if request[-1].cancelled():
+                continue
+            _, top_k, rerank_k, instruction, _ = request
+            groups.setdefault((top_k, rerank_k, instruction["query"]), []).append(
+                request
+            )
+        for requests in groups.values():
+            await self._run(requests)
+
+    async def _run(self, requests: List[tuple]) -> None:
+        _, top_k, rerank_k, instruction, _ = requests[0]
+        queries = [request[0] for request in requests]
+
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(
+                self.executor,
+                self.rag.search_batch,
+                queries,
+                top_k,
+                rerank_k,
+                instruction,
+            )
+        except Exception as e:
+            for *_, future in requests:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (*_, future), result in zip(requests, results):
+            if not future.done():
+                future.set_result(result)
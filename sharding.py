@@ -0,0 +1,210 @@
+from concurrent.futures import Executor, ProcessPoolExecutor
+from retrievers import Retriever, _inner_products, _top_k
+from tracing import NULL_TRACE
+from typing import List, Optional, Tuple
+import multiprocessing
+import numpy as np
+import os
+import shutil
+import tempfile
+import weakref
+
+# Worker-side mapping of the published matrix, keyed by its spec
+_mapped = {}
+
+
+def _open(spec: tuple) -> np.ndarray:
+    """Map the published matrix read-only, reusing the mapping between calls"""
+    if spec not in _mapped:
+        # A new spec means the coordinator republished, drop the old mapping
+        _mapped.clear()
+        filename, offset, dtype, n_rows, dim = spec
+        _mapped[spec] = np.memmap(
+            filename, dtype=dtype, mode="r", offset=offset, shape=(n_rows, dim)
+        )
+    return _mapped[spec]
+
+
+def _score(
+    embeddings: np.ndarray,
+    first_row: int,
+    query_embeddings: np.ndarray,
+    k: int,
+    mask: Optional[np.ndarray],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Local top-k of one row range, with indices offset to global rows"""
+    scores = _inner_products(query_embeddings, embeddings)
+    if mask is not None:
+        scores[:, ~mask] = -np.inf
+    scores, indices = _top_k(scores, k)
+    return scores, np.where(indices >= 0, indices + first_row, -1)
+
+
+def _search_shard(
+    spec: tuple,
+    lo: int,
+    hi: int,
+    query_embeddings: np.ndarray,
+    k: int,
+    mask: Optional[np.ndarray],
+) -> Tuple[np.ndarray, np.ndarray]:
+    return _score(_open(spec)[lo:hi], lo, query_embeddings, k, mask)
+
+
+class ShardedRetriever(Retriever):
+    """
+    Exact search split by row range across worker processes
+
+    The embedding matrix is published once as a file that every worker
+    memory-maps read-only: the store's own embeddings.npy when the index was
+    opened with RAG.load(mmap=True), otherwise a raw copy spilled to
+    spill_dir (/dev/shm when available, so it stays in shared memory). A
+    search scores n_shards contiguous row ranges in parallel, every shard
+    returns its local top-k and the coordinator merges them. Rows appended
+    after the last publish are scored in the coordinator, and the matrix is
+    republished once that tail grows past one shard.
+
+    Workers are spawned and only unpickle functions from this module, so
+    they never load the models. Each worker runs its own BLAS thread pool,
+    so cap it (e.g. OMP_NUM_THREADS) at cpu_count / n_shards. Call close to
+    stop the workers; the spilled copy is also removed when the retriever is
+    collected or the interpreter exits.
+    """
+
+    def __init__(
+        self,
+        n_shards: Optional[int] = None,
+        spill_dir: Optional[str] = None,
+        executor: Optional[Executor] = None,
+    ):
+        """
+        Args:
+            n_shards: Row ranges scored in parallel (defaults to the CPU count)
+            spill_dir: Directory for the published copy of in-memory matrices
+            executor: Process pool running the shards (defaults to n_shards
+                spawned workers)
+        """
+        self.n_shards = n_shards or os.cpu_count() or 1
+        if spill_dir is None and os.path.isdir("/dev/shm"):
+            spill_dir = "/dev/shm"
+        self.spill_dir = spill_dir
+        self._owns_executor = executor is None
+        self._executor = executor
+        self._spill: Optional[weakref.finalize] = None
+        self.reset()
+
+    def __enter__(self) -> "ShardedRetriever":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Shut down the worker processes and remove the spilled matrix"""
+        self.reset()
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def reset(self) -> None:
+        self._embeddings: Optional[np.ndarray] = None
+        self._spec: Optional[tuple] = None
+        self._n_published = 0
+        if self._spill is not None:
+            self._spill()
+            self._spill = None
+
+    def index(self, embeddings: np.ndarray) -> None:
+        self._embeddings = embeddings
+        n = len(embeddings)
+        tail = n - self._n_published
+        # Rows are only appended between compactions, so the published prefix
+        # stays valid until the matrix shrinks
+        if tail < 0 or tail > self._n_published // self.n_shards:
+            self._publish(embeddings)
+
+    def _publish(self, embeddings: np.ndarray) -> None:
+        self.reset()
+        self._embeddings = embeddings
+        if len(embeddings) == 0:
+            return
+
+        if (
+            isinstance(embeddings, np.memmap)
+            and embeddings.filename is not None
+            and embeddings.flags.c_contiguous
+        ):
+            # The store's view starts at row 0, so the file offset still holds
+            filename, offset = embeddings.filename, embeddings.offset
+        else:
+            spill = tempfile.mkdtemp(prefix="rag-shards-", dir=self.spill_dir)
+            # Removed on reset, on garbage collection or at interpreter exit
+            self._spill = weakref.finalize(self, shutil.rmtree, spill, True)
+            filename, offset = os.path.join(spill, "embeddings.bin"), 0
+            np.ascontiguousarray(embeddings).tofile(filename)
+
+        self._spec = (
+            filename,
+            offset,
+            embeddings.dtype.str,
+            len(embeddings),
+            embeddings.shape[1],
+        )
+        self._n_published = len(embeddings)
+
+    def _pool(self) -> Executor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                self.n_shards, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def _bounds(self) -> List[Tuple[int, int]]:
+        edges = np.linspace(0, self._n_published, self.n_shards + 1).astype(int)
+        return [(lo, hi) for lo, hi in zip(edges[:-1], edges[1:]) if hi > lo]
+
+    def search(
+        self,
+        query_embeddings: np.ndarray,
+        k: int,
+        trace=NULL_TRACE,
+        mask: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        if self._embeddings is None:
+            raise ValueError("Retriever has no indexed embeddings")
+        query_embeddings = np.ascontiguousarray(query_embeddings, dtype=np.float32)
+
+        with trace.stage("shards"):
+            futures = [
+                self._pool().submit(
+                    _search_shard,
+                    self._spec,
+                    lo,
+                    hi,
+                    query_embeddings,
+                    k,
+                    None if mask is None else mask[lo:hi],
+                )
+                for lo, hi in self._bounds()
+            ]
+            # Score the unpublished tail while the workers run
+            lo = self._n_published
+            parts = [
+                _score(
+                    self._embeddings[lo:],
+                    lo,
+                    query_embeddings,
+                    k,
+                    None if mask is None else mask[lo:],
+                )
+            ]
+            parts += [future.result() for future in futures]
+        trace.count("shards", len(futures))
+
+        with trace.stage("merge"):
+            scores = np.concatenate([scores for scores, _ in parts], axis=1)
+            indices = np.concatenate([indices for _, indices in parts], axis=1)
+            scores, picked = _top_k(scores, k)
+            indices = np.take_along_axis(indices, np.maximum(picked, 0), axis=1)
+            indices[picked < 0] = -1
+        return scores, indices
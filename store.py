@@ -0,0 +1,339 @@
+from typing import BinaryIO, Callable, Dict, Iterable, List, Optional, Tuple
+import json
+import numpy as np
+import os
+
+
+def _write_atomic(target: str, write: Callable[[BinaryIO], None]) -> None:
+    """
+    Write a file beside target and rename it into place
+
+    Saving over an index that is still memory-mapped would otherwise
+    truncate the mapped file; the rename leaves the old inode to the mapping.
+    """
+    tmp = os.path.join(os.path.dirname(target), f".{os.path.basename(target)}.tmp")
+    with open(tmp, "wb") as f:
+        write(f)
+    os.replace(tmp, target)
+
+
+class ChunkStore:
+    """
+    Columnar storage for chunk embeddings and their metadata
+
+    Embeddings live in one preallocated matrix that grows geometrically, so
+    appends are amortized O(1) and search can score against a ready view of
+    the matrix without copying. Each document's text is stored once and
+    chunks are (doc_id, start, end) character spans into it, kept in arrays
+    parallel to the matrix rows, so overlapping windows cost no extra text.
+
+    Documents are addressed by a stable string key. Deleting a document only
+    tombstones its rows in the alive mask; compacted builds a copy without
+    dead rows, since row positions are shared with the retriever.
+    """
+
+    def __init__(
+        self, dim: Optional[int] = None, dtype=np.float32, capacity: int = 1024
+    ):
+        """
+        Args:
+            dim: Embedding dimension (inferred from the first append if None)
+            dtype: Storage dtype for embeddings (float32 or float16)
+            capacity: Initial number of rows to preallocate
+        """
+        self.dtype = np.dtype(dtype)
+        if self.dtype not in (np.dtype(np.float32), np.dtype(np.float16)):
+            raise ValueError("dtype must be float32 or float16")
+
+        self.dim = dim
+        self._capacity = max(1, capacity)
+        self._size = 0
+        self._embeddings: Optional[np.ndarray] = None
+        self._doc_ids = np.empty(self._capacity, dtype=np.int64)
+        self._starts = np.empty(self._capacity, dtype=np.int64)
+        self._ends = np.empty(self._capacity, dtype=np.int64)
+        self._alive = np.empty(self._capacity, dtype=bool)
+        self._n_dead = 0
+        self._doc_texts: List[str] = []
+        self._doc_keys: List[str] = []
+        self._doc_hashes: List[Optional[str]] = []
+        self._slots: Dict[str, int] = {}
+        self._next_key = 0
+        self.documents: List[Dict] = []
+
+        if dim is not None:
+            self._embeddings = np.empty((self._capacity, dim), dtype=self.dtype)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, i: int) -> Dict:
+        """Row view in the old per-chunk dict layout"""
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError("chunk index out of range")
+        return {
+            "text": self.text(i),
+            "embedding": self._embeddings[i],
+            "metadata": self.documents[self._doc_ids[i]],
+            "doc_id": self._doc_keys[self._doc_ids[i]],
+        }
+
+    @property
+    def embeddings(self) -> np.ndarray:
+        """(n_chunks, dim) view of the stored embeddings, no copy"""
+        if self._embeddings is None:
+            return np.empty((0, self.dim or 0), dtype=self.dtype)
+        return self._embeddings[: self._size]
+
+    @property
+    def doc_ids(self) -> np.ndarray:
+        """(n_chunks,) view of the document id owning each chunk"""
+        return self._doc_ids[: self._size]
+
+    @property
+    def n_live(self) -> int:
+        return self._size - self._n_dead
+
+    @property
+    def dead_fraction(self) -> float:
+        return self._n_dead / self._size if self._size else 0.0
+
+    @property
+    def live_mask(self) -> Optional[np.ndarray]:
+        """(n_chunks,) view of the alive mask, None when nothing is deleted"""
+        return self._alive[: self._size] if self._n_dead else None
+
+    def keys(self) -> List[str]:
+        """Keys of the live documents"""
+        return list(self._slots)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._slots
+
+    def content_hash(self, key: str) -> Optional[str]:
+        slot = self._slots.get(key)
+        return None if slot is None else self._doc_hashes[slot]
+
+    def text(self, i: int) -> str:
+        """Chunk text, sliced from its document on demand"""
+        return self._doc_texts[self._doc_ids[i]][self._starts[i] : self._ends[i]]
+
+    def document_text(self, doc_id: int) -> str:
+        return self._doc_texts[doc_id]
+
+    def new_key(self) -> str:
+        """Next generated document key, skipping keys callers already took"""
+        while True:
+            key = f"doc-{self._next_key}"
+            self._next_key += 1
+            if key not in self._slots:
+                return key
+
+    def add_document(
+        self,
+        text: str,
+        metadata: Optional[Dict] = None,
+        key: Optional[str] = None,
+        content_hash: Optional[str] = None,
+    ) -> int:
+        """
+        Register a document and return its id
+        Args:
+            text: Full document text that chunk spans point into
+            metadata: Metadata stored once per document
+            key: Stable document key (generated when None)
+            content_hash: Hash of text, used to skip unchanged re-ingests
+        """
+        if key is None:
+            key = self.new_key()
+        if key in self._slots:
+            raise ValueError(f"Document {key!r} already exists, delete it first")
+
+        self._doc_texts.append(text)
+        self.documents.append(metadata or {})
+        self._doc_keys.append(key)
+        self._doc_hashes.append(content_hash)
+        self._slots[key] = len(self.documents) - 1
+        return len(self.documents) - 1
+
+    def delete_documents(self, keys: Iterable[str]) -> int:
+        """
+        Tombstone every chunk of the given documents
+        Args:
+            keys: Document keys, unknown keys are ignored
+        Returns:
+            Number of documents deleted
+        """
+        slots = [self._slots.pop(key) for key in set(keys) if key in self._slots]
+        if slots:
+            dead = np.isin(self.doc_ids, slots)
+            alive = self._alive[: self._size]
+            self._n_dead += int((dead & alive).sum())
+            alive[dead] = False
+        return len(slots)
+
+    def append(self, embeddings: np.ndarray, starts, ends, doc_ids) -> None:
+        """
+        Append a block of chunks
+        Args:
+            embeddings: (n, dim) chunk embeddings
+            starts: Character offset where each chunk starts in its document
+            ends: Character offset where each chunk ends in its document
+            doc_ids: Document id per row (scalar or length n)
+        """
+        n = len(starts)
+        if n == 0:
+            return
+        embeddings = np.asarray(embeddings)
+        if embeddings.ndim != 2 or embeddings.shape[0] != n:
+            raise ValueError("embeddings must have shape (len(starts), dim)")
+
+        if self._embeddings is None:
+            self.dim = embeddings.shape[1]
+            self._embeddings = np.empty((self._capacity, self.dim), dtype=self.dtype)
+        elif embeddings.shape[1] != self.dim:
+            raise ValueError(
+                f"Expected embedding dim {self.dim}, got {embeddings.shape[1]}"
+            )
+
+        self._reserve(self._size + n)
+        end = self._size + n
+        self._embeddings[self._size : end] = embeddings
+        self._doc_ids[self._size : end] = doc_ids
+        self._starts[self._size : end] = starts
+        self._ends[self._size : end] = ends
+        self._alive[self._size : end] = True
+        self._size = end
+
+    def _reserve(self, size: int) -> None:
+        """Grow backing arrays geometrically to hold at least size rows"""
+        if size <= self._capacity:
+            return
+        capacity = max(1, self._capacity)
+        while capacity < size:
+            capacity *= 2
+
+        embeddings = np.empty((capacity, self.dim), dtype=self.dtype)
+        embeddings[: self._size] = self._embeddings[: self._size]
+        self._embeddings = embeddings
+
+        for name in ("_doc_ids", "_starts", "_ends"):
+            grown = np.empty(capacity, dtype=np.int64)
+            grown[: self._size] = getattr(self, name)[: self._size]
+            setattr(self, name, grown)
+
+        alive = np.empty(capacity, dtype=bool)
+        alive[: self._size] = self._alive[: self._size]
+        self._alive = alive
+
+        self._capacity = capacity
+
+    def compacted(self) -> Tuple["ChunkStore", np.ndarray]:
+        """
+        Copy of the store without deleted documents and dead rows
+        Returns:
+            (store, remap) where remap[old_row] is the new row, or -1 if dropped
+        """
+        live_slots = sorted(self._slots.values())
+        new_slots = np.full(len(self._doc_texts), -1, dtype=np.int64)
+        new_slots[live_slots] = np.arange(len(live_slots))
+
+        rows = np.flatnonzero(self._alive[: self._size])
+        store = ChunkStore(
+            dim=self.dim if self._embeddings is not None else None,
+            dtype=self.dtype,
+            capacity=max(1, len(rows)),
+        )
+        store._doc_texts = [self._doc_texts[s] for s in live_slots]
+        store.documents = [self.documents[s] for s in live_slots]
+        store._doc_keys = [self._doc_keys[s] for s in live_slots]
+        store._doc_hashes = [self._doc_hashes[s] for s in live_slots]
+        store._slots = {key: i for i, key in enumerate(store._doc_keys)}
+        store._next_key = self._next_key
+
+        n = len(rows)
+        if n:
+            np.take(self._embeddings, rows, axis=0, out=store._embeddings[:n])
+            store._doc_ids[:n] = new_slots[self._doc_ids[rows]]
+            store._starts[:n] = self._starts[rows]
+            store._ends[:n] = self._ends[rows]
+            store._alive[:n] = True
+            store._size = n
+
+        remap = np.full(self._size, -1, dtype=np.int64)
+        remap[rows] = np.arange(n)
+        return store, remap
+
+    def save(self, path: str) -> None:
+        """
+        Write the store to a directory
+        Args:
+            path: Directory for the .npy arrays and the chunks.json sidecar
+        """
+        os.makedirs(path, exist_ok=True)
+        arrays = {
+            "embeddings": self.embeddings,
+            "doc_ids": self.doc_ids,
+            "starts": self._starts[: self._size],
+            "ends": self._ends[: self._size],
+            "alive": self._alive[: self._size],
+        }
+        for name, array in arrays.items():
+            _write_atomic(
+                os.path.join(path, f"{name}.npy"), lambda f: np.save(f, array)
+            )
+
+        # Sidecar last, so it never describes arrays that are not in place yet
+        sidecar = json.dumps(
+            {
+                "dtype": self.dtype.name,
+                "dim": self.dim,
+                "size": self._size,
+                "doc_texts": self._doc_texts,
+                "documents": self.documents,
+                "doc_keys": self._doc_keys,
+                "doc_hashes": self._doc_hashes,
+                "slots": self._slots,
+                "next_key": self._next_key,
+            }
+        ).encode("utf-8")
+        _write_atomic(os.path.join(path, "chunks.json"), lambda f: f.write(sidecar))
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "ChunkStore":
+        """
+        Open a store written by save
+        Args:
+            path: Directory passed to save
+            mmap: Memory-map embeddings read-only instead of reading them in
+        """
+        with open(os.path.join(path, "chunks.json")) as f:
+            sidecar = json.load(f)
+
+        store = cls(dtype=sidecar["dtype"])
+        store._doc_texts = sidecar["doc_texts"]
+        store.documents = sidecar["documents"]
+        store._doc_keys = sidecar["doc_keys"]
+        store._doc_hashes = sidecar["doc_hashes"]
+        store._slots = sidecar["slots"]
+        store._next_key = sidecar["next_key"]
+        if sidecar["size"] == 0:
+            return store
+
+        # Backing arrays are exactly full, so the first append copies them
+        # into private memory and the mapped files are never written to
+        mmap_mode = "r" if mmap else None
+        store.dim = sidecar["dim"]
+        store._embeddings = np.load(
+            os.path.join(path, "embeddings.npy"), mmap_mode=mmap_mode
+        )
+        for name in ("doc_ids", "starts", "ends"):
+            array = np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+            setattr(store, f"_{name}", array)
+        # Tombstones are written in place, so the alive mask is never mapped
+        store._alive = np.load(os.path.join(path, "alive.npy"))
+        store._n_dead = int((~store._alive).sum())
+        store._size = store._capacity = sidecar["size"]
+        return store
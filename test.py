@@ -1,4 +1,17 @@
+from concurrent.futures import ThreadPoolExecutor
+from cache import EmbeddingCache, content_key
 from rag import RAG
+from retrievers import ExactRetriever, IVFRetriever
+from serving import AsyncRAG
+from sharding import ShardedRetriever
+from store import ChunkStore
+from tracing import NULL_TRACE, CallbackTracer, MetricsAggregator, NullTrace, Tracer
+import argparse
+import asyncio
+import bench
+import numpy as np
+import os
+import tempfile
 
 
 def test_basic_functionality():
@@ -145,6 +158,577 @@ The key to successful AI integration lies in striking the right balance between
         print(f"Text: {text[:200]}...")
 
 
+def test_save_load():
+    """Test that a saved index reopens memory-mapped with identical results"""
+    rag = RAG()
+    rag.add_documents(
+        [
+            "The film opens with two bandits robbing a stagecoach in the desert.",
+            "A young woman travels to Paris to study painting and falls in love.",
+        ]
+    )
+
+    print("\n5. Testing index save and memory-mapped load...")
+    with tempfile.TemporaryDirectory() as path:
+        rag.save(path)
+        loaded = RAG.load(path, mmap=True)
+        print(f"Number of chunks loaded: {len(loaded.chunks)}")
+        assert len(loaded.chunks) == len(rag.chunks)
+        assert (loaded.chunks.embeddings == rag.chunks.embeddings).all()
+
+        query = "Who robs the stagecoach?"
+        assert loaded.search(query, top_k=1) == rag.search(query, top_k=1)
+
+
+def test_search_batch():
+    """Test that batched search matches single-query search"""
+    rag = RAG()
+    rag.add_documents(
+        [
+            "The film opens with two bandits robbing a stagecoach in the desert.",
+            "A young woman travels to Paris to study painting and falls in love.",
+            "A submarine crew is trapped beneath the Arctic ice after an explosion.",
+        ]
+    )
+
+    print("\n6. Testing batched multi-query search...")
+    queries = ["Who robs the stagecoach?", "Where does she study painting?"]
+    batch_results = rag.search_batch(queries, top_k=3, rerank_k=2)
+    assert len(batch_results) == len(queries)
+    for query, results in zip(queries, batch_results):
+        single = rag.search(query, top_k=3, rerank_k=2)
+        assert [text for text, _ in results] == [text for text, _ in single]
+        scores = [score for _, score in results]
+        assert scores == sorted(scores, reverse=True)
+        print(f"{query} -> {results[0][0][:60]}...")
+
+
+def test_benchmark_stand_ins():
+    """Test the benchmark harness end to end with stand-in models"""
+    args = argparse.Namespace(
+        corpus="synthetic",
+        models="stand-in",
+        queries=20,
+        top_k=10,
+        batch_size=32,
+        chunk_docs=20,
+        warmup=2,
+        seed=0,
+    )
+
+    print("\n7. Testing benchmark harness with stand-in models...")
+    result = bench.bench_size(args, 1000)
+    print(f"Chunks benchmarked: {result['chunks']}")
+    assert result["chunks"] >= 1000
+    for stage in ("chunk", "add_documents", "first_stage", "rerank"):
+        stats = result["stages"][stage]
+        assert stats["p50_ms"] <= stats["p95_ms"] <= stats["p99_ms"]
+        print(f"{stage}: p50 {stats['p50_ms']:.3f}ms, p99 {stats['p99_ms']:.3f}ms")
+
+
+def test_async_micro_batching():
+    """Test that concurrent async searches are batched and routed back correctly"""
+    rag = bench.make_rag("stand-in")
+    rag.add_documents(bench.synthetic_corpus(1000))
+    queries = [f"w{i} w{i + 1}" for i in range(40)]
+    batch_sizes = []
+    search_batch = rag.search_batch
+
+    def counting_search_batch(batch, *args):
+        batch_sizes.append(len(batch))
+        return search_batch(batch, *args)
+
+    rag.search_batch = counting_search_batch
+
+    async def run():
+        async with AsyncRAG(rag, max_batch_size=16) as server:
+            return await asyncio.gather(*(server.search(q, top_k=5) for q in queries))
+
+    print("\n8. Testing async micro-batched search...")
+    results = asyncio.run(run())
+    print(f"{len(queries)} queries served in {len(batch_sizes)} batches")
+    assert len(batch_sizes) < len(queries)
+    for query, result in zip(queries, results):
+        assert result == search_batch([query], 5)[0]
+
+    # A closed server can be entered again
+    server = AsyncRAG(rag)
+
+    async def reuse():
+        for _ in range(2):
+            async with server:
+                assert await server.search(queries[0], top_k=5) == results[0]
+
+    asyncio.run(reuse())
+
+    # Closing while a batch is still forming serves every queued search
+    async def close_while_batching():
+        server = AsyncRAG(rag, max_batch_size=16, max_wait_ms=5.0)
+        for _ in range(200):
+            server.start()
+            pending = [
+                asyncio.ensure_future(server.search(q, top_k=5)) for q in queries
+            ]
+            await asyncio.sleep(0.001)
+            await asyncio.wait_for(server.close(), timeout=10)
+            done = await asyncio.gather(*pending, return_exceptions=True)
+            assert all(isinstance(result, list) for result in done)
+
+    asyncio.run(close_while_batching())
+
+
+def test_upsert_and_delete():
+    """Test incremental upserts, tombstoned deletes and compaction"""
+    rag = bench.make_rag("stand-in")
+    rag.compact_threshold = None
+    movies = {
+        "bandits": "The film opens with two bandits robbing a stagecoach.",
+        "paris": "A young woman travels to Paris to study painting.",
+        "arctic": "A submarine crew is trapped beneath the Arctic ice.",
+    }
+
+    print("\n9. Testing upsert, delete and compaction...")
+    rag.upsert_documents(movies)
+    stats = rag.upsert_documents(movies)
+    print(f"Unchanged documents skipped: {stats.skipped}")
+    assert stats.skipped == len(movies) and stats.chunks == 0
+
+    stats = rag.upsert_documents({"paris": "A young man travels to Rome to sculpt."})
+    assert stats.replaced == 1
+    texts = [text for text, _ in rag.search("Who travels to Paris?", top_k=5)]
+    assert not any("Paris" in text for text in texts)
+
+    assert rag.delete_documents(["bandits", "missing"]) == 1
+    texts = [text for text, _ in rag.search("bandits stagecoach", top_k=5)]
+    assert not any("bandits" in text for text in texts)
+
+    rag.compact()
+    print(f"Chunks after compaction: {len(rag.chunks)}")
+    assert rag.chunks.dead_fraction == 0
+    assert sorted(rag.chunks.keys()) == ["arctic", "paris"]
+
+    # Generated ids skip ids callers already took
+    rag = bench.make_rag("stand-in")
+    rag.upsert_documents({"doc-1": movies["arctic"]})
+    stats = rag.add_documents([movies["bandits"], movies["paris"], "A third film."])
+    print(f"Keys after mixing ids: {sorted(rag.chunks.keys())}")
+    assert stats.documents == 3 and stats.replaced == 0
+    assert sorted(rag.chunks.keys()) == ["doc-0", "doc-1", "doc-2", "doc-3"]
+    assert rag.chunks.content_hash("doc-1") == content_key(movies["arctic"])
+
+    try:
+        rag.add_documents(["one", "two"], ids=["only-one"])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("mismatched ids and documents were accepted")
+
+
+def test_hybrid_search():
+    """Test BM25 + dense fusion, persistence and deletes"""
+    rag = bench.make_rag("stand-in", hybrid=True)
+    rag.compact_threshold = None
+    movies = {
+        "prototype": "Engineers steal the XK47 prototype from a desert lab.",
+        "bandits": "The film opens with two bandits robbing a stagecoach.",
+        "arctic": "A submarine crew is trapped beneath the Arctic ice.",
+    }
+
+    print("\n10. Testing hybrid search...")
+    rag.upsert_documents(movies)
+    results = rag.search("Who took the XK47?", top_k=2, rerank_k=2)
+    print(f"Top hybrid result: {results[0][0]}")
+    assert "XK47" in results[0][0]
+
+    with tempfile.TemporaryDirectory() as path:
+        rag.save(path)
+        loaded = RAG.load(
+            path,
+            base_model=rag.base_model,
+            query_model=rag.query_model,
+            reranker=rag.reranker,
+            tokenizer=rag.tokenizer,
+        )
+    assert loaded.bm25 is not None and len(loaded.bm25) == len(rag.chunks)
+    assert loaded.search("Who took the XK47?", top_k=2)[0][0] == results[0][0]
+
+    # An index saved without hybrid gets its BM25 index built on load
+    dense = bench.make_rag("stand-in")
+    dense.upsert_documents(movies)
+    with tempfile.TemporaryDirectory() as path:
+        dense.save(path)
+        upgraded = RAG.load(
+            path,
+            hybrid=True,
+            base_model=rag.base_model,
+            query_model=rag.query_model,
+            reranker=rag.reranker,
+            tokenizer=rag.tokenizer,
+        )
+    assert len(upgraded.bm25) == len(dense.chunks)
+    assert upgraded.search("Who took the XK47?", top_k=2)[0][0] == results[0][0]
+
+    rag.delete_documents(["prototype"])
+    rag.compact()
+    texts = [text for text, _ in rag.search("XK47 prototype", top_k=3)]
+    assert not any("XK47" in text for text in texts)
+
+
+def test_sharded_search():
+    """Test that sharded multi-process search matches exact search"""
+    documents = bench.synthetic_corpus(300)
+    queries = bench.make_queries(documents, 10)
+    exact = bench.make_rag("stand-in")
+    exact.add_documents(documents)
+    expected = exact.search_batch(queries, top_k=10)
+
+    print("\n11. Testing sharded search...")
+    with ShardedRetriever(n_shards=3) as retriever:
+        rag = bench.make_rag("stand-in", retriever=retriever)
+        rag.add_documents(documents)
+        assert rag.search_batch(queries, top_k=10) == expected
+
+        # Reopened indexes are memory-mapped, so workers share the .npy file
+        with tempfile.TemporaryDirectory() as path:
+            rag.save(path)
+            retriever.reset()
+            loaded = RAG.load(
+                path,
+                retriever=retriever,
+                base_model=rag.base_model,
+                query_model=rag.query_model,
+                reranker=rag.reranker,
+                tokenizer=rag.tokenizer,
+            )
+            assert loaded.search_batch(queries, top_k=10) == expected
+            print(f"Shards: {len(retriever._bounds())}")
+
+    # The spilled copy of an in-memory matrix is removed even without close
+    spilled = ShardedRetriever(n_shards=2)
+    spilled.index(exact.chunks.embeddings)
+    spill_file = spilled._spec[0]
+    assert os.path.exists(spill_file)
+    del spilled
+    assert not os.path.exists(spill_file)
+
+
+def test_resave_mapped_index():
+    """Test load, delete, upsert and save back to the directory being mapped"""
+    rag = bench.make_rag("stand-in")
+    documents = bench.synthetic_corpus(200)
+    rag.upsert_documents({f"doc-{i}": doc for i, doc in enumerate(documents)})
+    models = {
+        "base_model": rag.base_model,
+        "query_model": rag.query_model,
+        "reranker": rag.reranker,
+        "tokenizer": rag.tokenizer,
+        "compact_threshold": None,
+    }
+
+    print("\n12. Testing save over a memory-mapped index...")
+    with tempfile.TemporaryDirectory() as path:
+        rag.save(path)
+        # A delete alone leaves the embeddings mapped from the files being replaced
+        loaded = RAG.load(path, mmap=True, **models)
+        loaded.delete_documents(["doc-0"])
+        loaded.save(path)
+
+        loaded = RAG.load(path, mmap=True, **models)
+        assert (loaded.chunks.embeddings == rag.chunks.embeddings).all()
+        loaded.upsert_documents({"arctic": "A submarine is trapped under the ice."})
+        loaded.save(path)
+
+        reloaded = RAG.load(path, mmap=True, **models)
+        print(f"Chunks after resave: {len(reloaded.chunks)}")
+        assert "doc-0" not in reloaded.chunks and "arctic" in reloaded.chunks
+        assert len(reloaded.chunks) == len(rag.chunks) + 1
+        query = "Who is trapped under the ice?"
+        assert reloaded.search(query, top_k=2) == loaded.search(query, top_k=2)
+
+
+def test_ivf_retriever():
+    """Test IVF against exact search and retraining as the corpus grows"""
+    rag = bench.make_rag("stand-in")
+    documents = bench.synthetic_corpus(2000)
+    rag.add_documents(documents)
+    embeddings = rag.chunks.embeddings
+    queries = rag.query_model.encode(bench.make_queries(documents, 50))
+
+    print("\n13. Testing the IVF retriever...")
+    exact = ExactRetriever()
+    exact.index(embeddings)
+    expected_scores, expected = exact.search(queries, 10)
+
+    # Scanning every list is an exact search, up to the order of tied rows
+    ivf = IVFRetriever(n_lists=32, nprobe=32)
+    ivf.index(embeddings)
+    scores, _ = ivf.search(queries, 10)
+    assert np.allclose(scores, expected_scores, atol=1e-5)
+
+    ivf.nprobe = 4
+    _, found = ivf.search(queries, 10)
+    recall = np.mean([len(set(f) & set(e)) / 10 for f, e in zip(found, expected)])
+    print(f"Recall@10 at nprobe=4: {recall:.3f}")
+    assert recall >= 0.7
+
+    # An early search trains on a few rows, later growth retrains the lists
+    ivf = IVFRetriever()
+    ivf.index(embeddings[:50])
+    n_lists = len(ivf.centroids)
+    ivf.index(embeddings)
+    print(f"Lists after growth: {n_lists} -> {len(ivf.centroids)}")
+    assert len(ivf.centroids) > n_lists
+
+
+def test_embedding_cache():
+    """Test memory hits, disk hits, misses and the LRU bound"""
+    encoder = bench.HashingEncoder()
+    texts = ["two bandits", "a stagecoach", "the Arctic ice"]
+
+    print("\n14. Testing the embedding cache...")
+    with tempfile.TemporaryDirectory() as path:
+        cache = EmbeddingCache(max_entries=2, path=path)
+        first = cache.encode(encoder, "hashing", texts)
+        assert cache.stats.misses == 3 and len(cache.memory) == 2
+
+        # The oldest text was evicted from memory but is still on disk
+        again = cache.encode(encoder, "hashing", texts[::-1])
+        print(f"Cache stats: {cache.stats}")
+        assert (cache.stats.hits, cache.stats.disk_hits) == (2, 1)
+        assert (again == first[::-1]).all()
+        cache.close()
+
+        reopened = EmbeddingCache(max_entries=2, path=path)
+        reopened.encode(encoder, "hashing", texts[:1])
+        reopened.encode(encoder, "other", texts[:1])
+        assert (reopened.stats.disk_hits, reopened.stats.misses) == (1, 1)
+        reopened.close()
+
+    # Chunk embeddings stay out of memory unless a document tier is requested
+    rag = bench.make_rag("stand-in")
+    rag.add_documents(bench.synthetic_corpus(50))
+    assert len(rag.document_cache.memory) == 0
+
+
+def test_rerank_cache_and_margin():
+    """Test cross-encoder score cache hits and pairs skipped by the margin"""
+    documents = bench.synthetic_corpus(200)
+    query = bench.make_queries(documents, 1)[0]
+    rag = RAG(
+        rerank_margin=0.0,
+        base_model=bench.HashingEncoder(),
+        query_model=bench.HashingEncoder(),
+        reranker=bench.OverlapCrossEncoder(),
+        tokenizer=bench.RegexTokenizer(),
+    )
+    rag.add_documents(documents)
+
+    print("\n15. Testing the rerank cache and adaptive margin...")
+    results = rag.search(query, top_k=10, rerank_k=5)
+    stats = rag.rerank_stats
+    print(f"Results: {len(results)}, pairs skipped: {stats.pairs_skipped}")
+    assert 1 <= len(results) < 5 and stats.pairs_skipped > 0
+    assert all(score != float("-inf") for _, score in results)
+
+    scored = stats.pairs_scored
+    assert rag.search(query, top_k=10, rerank_k=5) == results
+    assert stats.pairs_scored == scored and stats.pairs_cached == scored
+    assert stats.seconds_saved_per_query > 0
+
+
+def test_chunk_spans():
+    """Test that offset spans slice the original text at the old token windows"""
+    rag = bench.make_rag("stand-in")
+    text = bench.synthetic_corpus(1)[0]
+    tokens = rag.tokenizer.encode(text)
+    chunk_size, overlap = 16, 0.75
+    stride = int(chunk_size * (1 - overlap))
+
+    # Token windows of the decode-based chunker the spans replaced
+    windows = []
+    for i in range(0, len(tokens), stride):
+        windows.append(tokens[i : i + chunk_size])
+        if i + chunk_size >= len(tokens):
+            break
+
+    print("\n16. Testing offset-based chunk spans...")
+    spans = rag._chunk_spans(text, chunk_size, overlap)
+    print(f"Windows: {len(spans)} over {len(tokens)} tokens")
+    assert [window for _, _, window in spans] == windows
+    for start, end, window in spans:
+        assert rag.tokenizer.encode(text[start:end]) == window
+    assert rag.chunk(text, chunk_size, overlap) == [
+        text[start:end] for start, end, _ in spans
+    ]
+
+
+def test_preloaded_model_names():
+    """Test that preloaded encoders get distinct cache keys and saved names"""
+    documents = bench.synthetic_corpus(20)
+
+    print("\n17. Testing names of preloaded models...")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        rags = []
+        for dim in (384, 128):
+            rag = RAG(
+                cache_dir=cache_dir,
+                base_model=bench.HashingEncoder(dim),
+                query_model=bench.HashingEncoder(dim),
+                reranker=bench.OverlapCrossEncoder(),
+                tokenizer=bench.RegexTokenizer(),
+            )
+            rag.add_documents(documents)
+            rag.document_cache.close()
+            rag.embedding_cache.close()
+            rags.append(rag)
+
+        print(f"Model names: {[rag.base_model_name for rag in rags]}")
+        assert rags[0].base_model_name != rags[1].base_model_name
+        assert rags[1].document_cache.stats.disk_hits == 0
+        assert rags[1].chunks.dim == 128
+
+        explicit = bench.make_rag("stand-in", base_model_name="hashing-384")
+        assert explicit.base_model_name == "hashing-384"
+
+
+def test_tracing():
+    """Test stage timings, counters and hit rates reported by the tracers"""
+    documents = bench.synthetic_corpus(100)
+    queries = bench.make_queries(documents, 4)
+    models = {
+        "base_model": bench.HashingEncoder(),
+        "query_model": bench.HashingEncoder(),
+        "reranker": bench.OverlapCrossEncoder(),
+        "tokenizer": bench.RegexTokenizer(),
+    }
+
+    class Recorder(Tracer):
+        def on_search(self, trace):
+            traces.append(trace)
+
+    print("\n18. Testing search tracing...")
+    traces = []
+    untraced = RAG(**models, tracer=Recorder())
+    untraced.add_documents(documents)
+    assert untraced.tracer.begin() is NULL_TRACE
+    untraced.search_batch(queries)
+    assert traces == [] and isinstance(RAG(**models).tracer.begin(), NullTrace)
+
+    metrics = MetricsAggregator()
+    rag = RAG(**models, tracer=metrics)
+    rag.add_documents(documents)
+    rag.search_batch(queries, top_k=5)
+    rag.search_batch(queries, top_k=5)
+    summary = metrics.summary()
+    print(f"Stages: {sorted(summary['stages'])}")
+    assert metrics.calls == 2
+    assert {"total", "query_encode", "scoring", "top_k", "rerank"} <= set(
+        summary["stages"]
+    )
+    assert summary["stages"]["rerank"]["n"] == 2
+    assert summary["counts"]["queries"] == len(queries)
+    assert summary["counts"]["candidates"] == 5 * len(queries)
+    # The second call is served entirely from the query and score caches
+    assert summary["hit_rates"] == {"query_cache": 0.5, "rerank_cache": 0.5}
+
+    rag.tracer = CallbackTracer(traces.append)
+    rag.search(queries[0])
+    assert len(traces) == 1 and traces[0].total > 0
+    assert traces[0].counts["query_cache_hits"] == 1
+
+    metrics.reset()
+    assert metrics.calls == 0 and metrics.summary()["stages"] == {}
+
+    # Overlapping searches each count only their own cache lookups
+    traces.clear()
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda i: rag.search(f"w{i}", top_k=5), range(160)))
+    assert len(traces) == 160
+    for trace in traces:
+        counts = trace.counts
+        assert counts["query_cache_hits"] + counts["query_cache_misses"] == 1
+        assert counts["rerank_cache_hits"] + counts["rerank_cache_misses"] == 5
+
+
+def test_chunk_store():
+    """Test store growth past its initial capacity and float16 storage"""
+    rng = np.random.default_rng(0)
+    store = ChunkStore(dim=8)
+    expected, texts = [], []
+    for block in range(15):
+        text = f"document {block} " * 20
+        doc_id = store.add_document(text, {"block": block})
+        embeddings = rng.standard_normal((100, 8)).astype(np.float32)
+        starts = np.arange(100)
+        store.append(embeddings, starts, starts + 10, doc_id)
+        expected.append(embeddings)
+        texts += [text[start : start + 10] for start in starts]
+
+    print("\n19. Testing chunk store growth and float16 storage...")
+    print(f"Rows: {len(store)}")
+    assert len(store) == 1500
+    assert (store.embeddings == np.concatenate(expected)).all()
+    for i in (0, 1023, 1024, 1499):
+        chunk = store[i]
+        assert chunk["text"] == texts[i] and chunk["metadata"] == {"block": i // 100}
+        assert (chunk["embedding"] == expected[i // 100][i % 100]).all()
+
+    documents = bench.synthetic_corpus(300)
+    queries = bench.make_queries(documents, 20)
+    rankings = {}
+    for dtype in (np.float32, np.float16):
+        rag = bench.make_rag("stand-in", embedding_dtype=dtype)
+        rag.add_documents(documents)
+        assert rag.chunks.embeddings.dtype == dtype
+        rag.retriever.index(rag.chunks.embeddings)
+        rankings[dtype] = rag.retriever.search(rag.query_model.encode(queries), 10)
+
+    # float16 rounding can only swap rows whose scores are within ~1e-3
+    scores, rows = rankings[np.float32]
+    half_scores, half_rows = rankings[np.float16]
+    agreement = (half_rows == rows).mean()
+    print(f"float16 ranking agreement: {agreement:.3f}")
+    assert half_scores.dtype == np.float32
+    assert np.allclose(half_scores, scores, atol=1e-3) and agreement >= 0.95
+
+
+def test_streaming_ingest():
+    """Test pooled, length-sorted ingest from an iterator"""
+    rag = bench.make_rag("stand-in")
+    documents = bench.synthetic_corpus(200)
+    progress = []
+
+    print("\n20. Testing streaming ingest...")
+    stats = rag.add_documents(
+        iter(documents),
+        batch_size=4,
+        pool_size=2,
+        progress=lambda stats: progress.append((stats.documents, stats.chunks)),
+    )
+    print(f"{stats.chunks} chunks in {len(progress)} pools")
+    assert stats.documents == len(documents) and stats.chunks == len(rag.chunks)
+    assert stats.tokens == sum(
+        len(tokens) for doc in documents for _, _, tokens in rag._chunk_spans(doc)
+    )
+    assert len(progress) > 1 and progress[-1] == (stats.documents, stats.chunks)
+    assert progress == sorted(progress)
+
+    # Rows come back in input order despite the length-sorted batches
+    texts = [rag.chunks.text(i) for i in range(len(rag.chunks))]
+    assert np.allclose(rag.chunks.embeddings, rag.base_model.encode(texts))
+
+    def failing_source():
+        yield documents[0]
+        raise OSError("source went away")
+
+    try:
+        rag.add_documents(failing_source())
+    except OSError as e:
+        assert str(e) == "source went away"
+    else:
+        raise AssertionError("source error was not re-raised")
+
+
 if __name__ == "__main__":
     print("Starting RAG Pipeline Tests...")
 
@@ -155,6 +739,54 @@ if __name__ == "__main__":
         print("\n=== Multiple Documents Test ===")
         test_multiple_documents()
 
+        print("\n=== Save/Load Test ===")
+        test_save_load()
+
+        print("\n=== Batched Search Test ===")
+        test_search_batch()
+
+        print("\n=== Benchmark Harness Test ===")
+        test_benchmark_stand_ins()
+
+        print("\n=== Async Serving Test ===")
+        test_async_micro_batching()
+
+        print("\n=== Upsert/Delete Test ===")
+        test_upsert_and_delete()
+
+        print("\n=== Hybrid Search Test ===")
+        test_hybrid_search()
+
+        print("\n=== Sharded Search Test ===")
+        test_sharded_search()
+
+        print("\n=== Resave Mapped Index Test ===")
+        test_resave_mapped_index()
+
+        print("\n=== IVF Retriever Test ===")
+        test_ivf_retriever()
+
+        print("\n=== Embedding Cache Test ===")
+        test_embedding_cache()
+
+        print("\n=== Rerank Cache Test ===")
+        test_rerank_cache_and_margin()
+
+        print("\n=== Chunk Spans Test ===")
+        test_chunk_spans()
+
+        print("\n=== Preloaded Model Names Test ===")
+        test_preloaded_model_names()
+
+        print("\n=== Tracing Test ===")
+        test_tracing()
+
+        print("\n=== Chunk Store Test ===")
+        test_chunk_store()
+
+        print("\n=== Streaming Ingest Test ===")
+        test_streaming_ingest()
+
     except Exception as e:
         print(f"\nError occurred: {str(e)}")
 
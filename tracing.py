@@ -0,0 +1,173 @@
+from collections import defaultdict, deque
+from typing import Callable, Dict
+import numpy as np
+import threading
+import time
+
+
+class _Stage:
+    """Context manager adding its elapsed time to one stage of a trace"""
+
+    __slots__ = ("_durations", "_name", "_start")
+
+    def __init__(self, durations: Dict[str, float], name: str):
+        self._durations = durations
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self._start
+        self._durations[self._name] = self._durations.get(self._name, 0.0) + elapsed
+        return False
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class NullTrace:
+    """Trace that records nothing, handed out by the default tracer"""
+
+    __slots__ = ()
+    _stage = _NullStage()
+
+    def stage(self, name: str) -> _NullStage:
+        return self._stage
+
+    def count(self, name: str, value: float) -> None:
+        pass
+
+
+NULL_TRACE = NullTrace()
+
+
+class SearchTrace:
+    """Per-call record of stage durations (seconds) and counters"""
+
+    __slots__ = ("durations", "counts", "start", "total")
+
+    def __init__(self):
+        self.durations: Dict[str, float] = {}
+        self.counts: Dict[str, float] = {}
+        self.start = time.perf_counter()
+        self.total = 0.0
+
+    def stage(self, name: str) -> _Stage:
+        """Time a block; repeated stages with the same name accumulate"""
+        return _Stage(self.durations, name)
+
+    def count(self, name: str, value: float) -> None:
+        self.counts[name] = self.counts.get(name, 0) + value
+
+
+class Tracer:
+    """
+    Instrumentation hook for RAG.search_batch
+
+    The base class is a no-op: begin hands out a shared NullTrace, so an
+    untraced search pays one method call per stage. Subclasses that set
+    enabled get a fresh SearchTrace per call and receive it in on_search.
+    """
+
+    enabled = False
+
+    def begin(self):
+        return SearchTrace() if self.enabled else NULL_TRACE
+
+    def finish(self, trace) -> None:
+        if self.enabled:
+            trace.total = time.perf_counter() - trace.start
+            self.on_search(trace)
+
+    def on_search(self, trace: SearchTrace) -> None:
+        pass
+
+
+class CallbackTracer(Tracer):
+    """Forward every finished trace to a callback"""
+
+    enabled = True
+
+    def __init__(self, callback: Callable[[SearchTrace], None]):
+        self.callback = callback
+
+    def on_search(self, trace: SearchTrace) -> None:
+        self.callback(trace)
+
+
+class MetricsAggregator(Tracer):
+    """Keep rolling windows of recent traces and summarize them as percentiles"""
+
+    enabled = True
+
+    def __init__(self, window: int = 10_000):
+        """
+        Args:
+            window: Number of most recent calls kept per stage and counter
+        """
+        self.window = window
+        self.calls = 0
+        self._durations = defaultdict(lambda: deque(maxlen=window))
+        self._counts = defaultdict(lambda: deque(maxlen=window))
+        self._lock = threading.Lock()
+
+    def on_search(self, trace: SearchTrace) -> None:
+        with self._lock:
+            self.calls += 1
+            self._durations["total"].append(trace.total)
+            for name, seconds in trace.durations.items():
+                self._durations[name].append(seconds)
+            for name, value in trace.counts.items():
+                self._counts[name].append(value)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Percentiles over the rolling window
+        Returns:
+            {"stages": {stage: {p50_ms, p95_ms, p99_ms, mean_ms, n}},
+             "counts": {counter: mean per call},
+             "hit_rates": {cache: hit rate over the window}}
+        """
+        with self._lock:
+            durations = {name: np.array(v) for name, v in self._durations.items()}
+            counts = {name: np.array(v) for name, v in self._counts.items()}
+
+        stages = {}
+        for name, values in durations.items():
+            p50, p95, p99 = np.percentile(values, [50, 95, 99]) * 1000
+            stages[name] = {
+                "p50_ms": float(p50),
+                "p95_ms": float(p95),
+                "p99_ms": float(p99),
+                "mean_ms": float(values.mean() * 1000),
+                "n": len(values),
+            }
+
+        hit_rates = {}
+        for name in counts:
+            if name.endswith("_hits"):
+                cache = name[: -len("_hits")]
+                hits = counts[name].sum()
+                lookups = hits + counts.get(f"{cache}_misses", np.zeros(1)).sum()
+                hit_rates[cache] = float(hits / lookups) if lookups else 0.0
+
+        return {
+            "stages": stages,
+            "counts": {name: float(v.mean()) for name, v in counts.items()},
+            "hit_rates": hit_rates,
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls = 0
+            self._durations.clear()
+            self._counts.clear()